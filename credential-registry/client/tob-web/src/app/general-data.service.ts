@@ -138,21 +138,12 @@ export class GeneralDataService {
       return from([]);
     }
     let params = new HttpParams().set('q', term);
-    return this.loadFromApi('search/autocomplete', params)
+    return this.loadFromApi('search/suggest', params)
       .pipe(map(response => {
         let ret = [];
         for(let row of response['results']) {
-          let found = null;
-          for(let name of row.names) {
-            if(~ name.text.toLowerCase().indexOf(term.toLowerCase())) {
-              found = name.text;
-              break;
-            } else if(found === null) {
-              found = name.text;
-            }
-          }
-          if(found !== null) {
-            ret.push({id: row.id, term: found});
+          if(row.name) {
+            ret.push({id: row.topic_id, term: row.name});
           }
         }
         return ret;
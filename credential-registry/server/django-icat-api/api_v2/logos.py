@@ -0,0 +1,191 @@
+"""
+Serve issuer and credential type logos.
+
+Logos are stored base64-encoded in the database. The decoded image and its
+sniffed content type are kept in a bounded in-memory cache keyed by the
+model, ID and update timestamp(s) of the source rows, so each logo is only
+loaded and decoded again after it has been changed.
+
+The IDs of the rows with a logo are cached as well, so that has_logo can be
+rendered without loading the logo columns.
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.utils import VersionedCache
+
+LOGGER = logging.getLogger(__name__)
+
+# model, columns identifying the logo version, logo columns in order of preference
+LOGO_SOURCES = {
+    "issuer": (Issuer, ("update_timestamp",), ("logo_b64",)),
+    "credentialtype": (
+        CredentialType,
+        ("update_timestamp", "issuer__update_timestamp"),
+        ("logo_b64", "issuer__logo_b64"),
+    ),
+}
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+    (b"BM", "image/bmp"),
+)
+
+# Logos are untrusted content: SVG logos must not run scripts or load other
+# resources when opened directly, and browsers must not sniff another type
+LOGO_SECURITY_HEADERS = {
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+    "X-Content-Type-Options": "nosniff",
+}
+
+_CACHE_LOCK = threading.Lock()
+_CACHE = OrderedDict()
+
+_LOGO_IDS = VersionedCache("logo_ids:version")
+
+
+def cache_size() -> int:
+    return getattr(settings, "LOGO_CACHE_SIZE", 500)
+
+
+def max_age() -> int:
+    return getattr(settings, "LOGO_MAX_AGE", 86400)
+
+
+def sniff_content_type(data: bytes) -> str:
+    """
+    Determine the image content type from the leading bytes
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    head = data[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+
+def decode_logo(value: str) -> bytes:
+    if value.startswith("data:") and "," in value:
+        # data URI
+        value = value.split(",", 1)[1]
+    try:
+        return base64.b64decode(value)
+    except (binascii.Error, ValueError):
+        LOGGER.warning("Could not decode stored logo")
+        return b""
+
+
+def _cache_get(key):
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None:
+            _CACHE.move_to_end(key)
+        return entry
+
+
+def _cache_put(key, entry):
+    with _CACHE_LOCK:
+        _CACHE[key] = entry
+        while len(_CACHE) > cache_size():
+            _CACHE.popitem(last=False)
+
+
+def logo_ids(model_cls) -> set:
+    """
+    The IDs of the rows of an issuer or credential type model with a stored
+    logo, reloaded after LOCAL_CACHE_TTL seconds or clear_logo_ids
+    """
+    cached = _LOGO_IDS.values()
+    ids = cached.get(model_cls)
+    if ids is None:
+        ids = set(
+            model_cls.objects.exclude(logo_b64__isnull=True).exclude(logo_b64="")
+            .values_list("id", flat=True))
+        cached[model_cls] = ids
+    return ids
+
+
+def clear_logo_ids():
+    """
+    Reset the cached logo IDs in all processes, called when issuers are
+    registered
+    """
+    _LOGO_IDS.clear()
+
+
+def load_logo(source: str, pk, version: tuple) -> tuple:
+    """
+    Return the (content type, image bytes) of a logo, decoding the stored
+    value only when the cached copy is missing or outdated
+    """
+    key = (source, pk, version)
+    entry = _cache_get(key)
+    if entry is None:
+        model_cls, _version_fields, logo_fields = LOGO_SOURCES[source]
+        values = model_cls.objects.filter(pk=pk).values_list(*logo_fields).first() or ()
+        logo = b""
+        for value in values:
+            if value:
+                logo = decode_logo(value)
+                break
+        entry = (sniff_content_type(logo), logo)
+        _cache_put(key, entry)
+    return entry
+
+
+def logo_response(request, source: str, pk) -> HttpResponse:
+    """
+    Build the logo response for an issuer or credential type, answering
+    conditional requests without loading the logo
+    """
+    model_cls, version_fields, _logo_fields = LOGO_SOURCES[source]
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise Http404()
+    version = model_cls.objects.filter(pk=pk).values_list(*version_fields).first()
+    if version is None:
+        raise Http404()
+
+    timestamps = [stamp for stamp in version if stamp]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    etag = '"{}"'.format(hashlib.sha1(
+        repr((source, pk, [stamp and stamp.isoformat() for stamp in version])).encode("utf-8")
+    ).hexdigest())
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age={}".format(max_age()),
+    }
+    headers.update(LOGO_SECURITY_HEADERS)
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    response = get_conditional_response(
+        getattr(request, "_request", request), etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type, logo = load_logo(source, pk, version)
+        if not logo:
+            raise Http404()
+        response = HttpResponse(logo, content_type=content_type)
+    for name, value in headers.items():
+        response[name] = value
+    return response
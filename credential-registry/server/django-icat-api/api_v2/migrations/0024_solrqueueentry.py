@@ -0,0 +1,29 @@
+# Generated by Django 2.1.5 on 2026-10-19 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0023_issuer_endpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolrQueueEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('index', models.TextField()),
+                ('using', models.TextField(default='default')),
+                ('object_id', models.TextField()),
+                ('delete', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'solr_queue',
+                'ordering': ('id',),
+            },
+        ),
+    ]
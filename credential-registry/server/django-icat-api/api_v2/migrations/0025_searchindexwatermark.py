@@ -0,0 +1,32 @@
+# Generated by Django 2.1.5 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0024_solrqueueentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('index', models.TextField()),
+                ('using', models.TextField(default='default')),
+                ('watermark', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'search_index_watermark',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchindexwatermark',
+            unique_together={('index', 'using')},
+        ),
+    ]
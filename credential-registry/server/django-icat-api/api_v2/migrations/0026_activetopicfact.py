@@ -0,0 +1,41 @@
+# Generated by Django 2.1.5 on 2026-10-19 19:10
+
+import django.contrib.postgres.fields.jsonb
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v2', '0025_searchindexwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveTopicFact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_timestamp', models.DateTimeField(auto_now_add=True, null=True)),
+                ('update_timestamp', models.DateTimeField(auto_now=True, null=True)),
+                ('kind', models.TextField()),
+                ('fact_id', models.IntegerField()),
+                ('effective_date', models.DateTimeField(null=True)),
+                ('inactive', models.BooleanField(default=False)),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('credential', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_v2.Credential')),
+                ('credential_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_v2.CredentialType')),
+                ('issuer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_v2.Issuer')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='active_facts', to='api_v2.Topic')),
+            ],
+            options={
+                'db_table': 'active_topic_fact',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='activetopicfact',
+            index_together={('topic', 'kind')},
+        ),
+    ]
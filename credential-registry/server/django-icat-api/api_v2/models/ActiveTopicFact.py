@@ -0,0 +1,190 @@
+from datetime import date
+
+from django.conf import settings
+from django.contrib.postgres import fields as contrib
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction, DEFAULT_DB_ALIAS
+
+from .Auditable import Auditable
+
+from .Address import Address
+from .Attribute import Attribute
+from .Credential import Credential
+from .CredentialType import CredentialType
+from .Issuer import Issuer
+from .Name import Name
+
+# Fact kind, model class and key used by Topic.get_active_*
+FACT_KINDS = (
+    ("name", Name, "names"),
+    ("address", Address, "addresses"),
+    ("attribute", Attribute, "attributes"),
+)
+FACT_MODELS = {kind: model_cls for kind, model_cls, _key in FACT_KINDS}
+FACT_KEYS = {kind: key for kind, _cls, key in FACT_KINDS}
+# Copied fields of each kind, including the audit timestamps
+FACT_FIELDS = {
+    kind: [
+        field for field in model_cls._meta.concrete_fields
+        if not field.is_relation and not field.primary_key
+    ]
+    for kind, model_cls, _key in FACT_KINDS
+}
+
+
+def active_facts_enabled() -> bool:
+    return getattr(settings, "ACTIVE_TOPIC_FACTS", False)
+
+
+def dump_value(value):
+    # keep full precision, DjangoJSONEncoder truncates times to milliseconds
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class ActiveTopicFact(Auditable):
+    """
+    A copy of a name, address or attribute belonging to an active (latest
+    and unrevoked) credential of a topic, maintained by the CredentialManager
+    """
+    topic = models.ForeignKey("Topic", related_name="active_facts", on_delete=models.CASCADE)
+    credential = models.ForeignKey(Credential, related_name="+", on_delete=models.CASCADE)
+    credential_type = models.ForeignKey(CredentialType, related_name="+", on_delete=models.CASCADE)
+    issuer = models.ForeignKey(Issuer, related_name="+", on_delete=models.CASCADE)
+    kind = models.TextField()
+    fact_id = models.IntegerField()
+    effective_date = models.DateTimeField(null=True)
+    inactive = models.BooleanField(default=False)
+    data = contrib.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = "active_topic_fact"
+        index_together = (("topic", "kind"),)
+        ordering = ('id',)
+
+    @classmethod
+    def refresh_topics(cls, topic_ids):
+        """
+        Rebuild the facts for a set of topics from their active credentials,
+        repairing any drift from incremental updates.
+        The topics are locked for the rest of the enclosing transaction so
+        that competing credentials cannot interleave their rebuilds.
+        """
+        from .Topic import Topic
+
+        topic_ids = set(topic_ids)
+        if not topic_ids:
+            return
+        with transaction.atomic(savepoint=False):
+            Topic.lock_topics(topic_ids)
+            cls.objects.filter(topic_id__in=topic_ids)._raw_delete(using=DEFAULT_DB_ALIAS)
+            cls.objects.bulk_create(cls._build_facts(
+                Credential.objects.filter(topic_id__in=topic_ids, latest=True, revoked=False)
+            ))
+
+    @classmethod
+    def update_credentials(cls, credential_ids, credential_set_ids=()):
+        """
+        Revise the facts of credentials whose search models or state changed,
+        along with the previously and currently active members of their
+        credential sets. The caller must hold the locks on their topics.
+        """
+        from .CredentialSet import CredentialSet
+
+        credential_ids = set(credential_ids)
+        credential_set_ids = set(filter(None, credential_set_ids))
+        if credential_set_ids:
+            credential_ids.update(
+                cls.objects.filter(credential__credential_set_id__in=credential_set_ids)
+                .values_list("credential_id", flat=True)
+            )
+            credential_ids.update(
+                CredentialSet.objects.filter(id__in=credential_set_ids)
+                .exclude(latest_credential=None)
+                .values_list("latest_credential_id", flat=True)
+            )
+        if not credential_ids:
+            return
+        cls.objects.filter(credential_id__in=credential_ids)._raw_delete(
+            using=DEFAULT_DB_ALIAS)
+        cls.objects.bulk_create(cls._build_facts(
+            Credential.objects.filter(id__in=credential_ids, latest=True, revoked=False)
+        ))
+
+    @classmethod
+    def _build_facts(cls, credentials) -> list:
+        credentials = {
+            cred.id: cred for cred in
+            credentials.select_related("credential_type")
+            .only("id", "topic_id", "effective_date", "inactive",
+                  "credential_type_id", "credential_type__issuer_id")
+        }
+        if not credentials:
+            return []
+        facts = []
+        for kind, model_cls, _key in FACT_KINDS:
+            fields = FACT_FIELDS[kind]
+            for row in model_cls.objects.filter(credential_id__in=credentials):
+                credential = credentials[row.credential_id]
+                facts.append(cls(
+                    topic_id=credential.topic_id,
+                    credential_id=credential.id,
+                    credential_type_id=credential.credential_type_id,
+                    issuer_id=credential.credential_type.issuer_id,
+                    kind=kind,
+                    fact_id=row.id,
+                    effective_date=credential.effective_date,
+                    inactive=credential.inactive,
+                    data={
+                        field.attname: dump_value(getattr(row, field.attname))
+                        for field in fields
+                    },
+                ))
+        return facts
+
+    @classmethod
+    def load_for_topics(cls, topic_ids, with_issuers=False) -> dict:
+        """
+        Load the active names, addresses and attributes for a set of topics
+        as unsaved model instances, keyed by topic ID
+        """
+        topic_ids = set(topic_ids)
+        result = {
+            topic_id: {key: [] for _kind, _cls, key in FACT_KINDS}
+            for topic_id in topic_ids
+        }
+        if not topic_ids:
+            return result
+        facts = list(cls.objects.filter(topic_id__in=topic_ids).order_by("topic_id", "id"))
+        issuers = None
+        if with_issuers:
+            issuers = Issuer.objects.defer(*Issuer.DEFERRED_FIELDS).in_bulk(
+                {fact.issuer_id for fact in facts})
+        for fact in facts:
+            result[fact.topic_id][FACT_KEYS[fact.kind]].append(fact.to_instance(issuers))
+        return result
+
+    def to_instance(self, issuers: dict = None):
+        """
+        Build an unsaved Name, Address or Attribute from the fact, with a
+        partial credential holding the fields used by the serializers
+        """
+        model_cls = FACT_MODELS[self.kind]
+        credential = Credential(
+            id=self.credential_id,
+            topic_id=self.topic_id,
+            credential_type_id=self.credential_type_id,
+            effective_date=self.effective_date,
+            inactive=self.inactive,
+            latest=True,
+            revoked=False,
+        )
+        if issuers is not None and self.issuer_id in issuers:
+            credential.credential_type = CredentialType(
+                id=self.credential_type_id, issuer=issuers[self.issuer_id])
+        values = {
+            field.attname: field.to_python(self.data[field.attname])
+            for field in FACT_FIELDS[self.kind] if field.attname in self.data
+        }
+        return model_cls(id=self.fact_id, credential=credential, **values)
@@ -34,23 +34,27 @@ class Credential(Auditable):
         ordering = ('id',)
 
     _cache = None
-    def _cached(self, key, val):
+    def _cached(self, key, loader):
+        # loader is only called on the first access to the key
         cache = self._cache
         if cache is None:
             self._cache = cache = {}
         if key not in cache:
-            cache[key] = val
+            cache[key] = loader()
         return cache[key]
 
     # used by solr document index
     @property
     def all_names(self):
-        return self._cached('names', self.names.all())
+        return self._cached('names', self.names.all)
 
     @property
     def all_categories(self):
-        return self._cached('categories', self.attributes.filter(format='category'))
+        # filter in python to make use of any prefetched attributes
+        return self._cached('categories', lambda: [
+            attr for attr in self.attributes.all() if attr.format == 'category'
+        ])
 
     @property
     def all_attributes(self):
-        return self._cached('attributes', self.attributes.all())
+        return self._cached('attributes', self.attributes.all)
@@ -21,10 +21,24 @@ class CredentialType(Auditable):
     claim_labels = contrib.JSONField(blank=True, null=True)
     category_labels = contrib.JSONField(blank=True, null=True)
 
+    # columns left out of queries unless rendered
+    DEFERRED_FIELDS = (
+        "category_labels",
+        "claim_descriptions",
+        "claim_labels",
+        "logo_b64",
+        "processor_config",
+    )
+
     class Meta:
         db_table = "credential_type"
         unique_together = (("schema", "issuer"),)
         ordering = ('id',)
 
     def get_has_logo(self):
-        return bool(self.logo_b64 or (self.issuer and self.issuer.logo_b64))
+        if "logo_b64" in self.get_deferred_fields():
+            # imported here to avoid a circular import
+            from api_v2.logos import logo_ids
+            return self.id in logo_ids(CredentialType) or \
+                self.issuer_id in logo_ids(Issuer)
+        return bool(self.logo_b64 or (self.issuer and self.issuer.get_has_logo()))
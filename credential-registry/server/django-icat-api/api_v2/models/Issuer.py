@@ -12,9 +12,16 @@ class Issuer(Auditable):
     logo_b64 = models.TextField(null=True)
     endpoint = models.TextField(null=True)
 
+    # columns left out of queries unless rendered
+    DEFERRED_FIELDS = ("logo_b64",)
+
     class Meta:
         db_table = "issuer"
         ordering = ('id',)
 
     def get_has_logo(self):
+        if "logo_b64" in self.get_deferred_fields():
+            # imported here to avoid a circular import
+            from api_v2.logos import logo_ids
+            return self.id in logo_ids(Issuer)
         return bool(self.logo_b64)
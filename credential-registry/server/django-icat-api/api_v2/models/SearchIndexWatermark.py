@@ -0,0 +1,17 @@
+from django.db import models
+
+from .Auditable import Auditable
+
+
+class SearchIndexWatermark(Auditable):
+    """
+    The update timestamp up to which a search index is known to be current
+    """
+    index = models.TextField()
+    using = models.TextField(default="default")
+    watermark = models.DateTimeField()
+
+    class Meta:
+        db_table = "search_index_watermark"
+        unique_together = (("index", "using"),)
+        ordering = ('id',)
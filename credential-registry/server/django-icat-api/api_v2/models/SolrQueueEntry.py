@@ -0,0 +1,18 @@
+from django.db import models
+
+from .Auditable import Auditable
+
+
+class SolrQueueEntry(Auditable):
+    """
+    A pending Solr index update or delete, recorded in the same transaction
+    as the change to the indexed model
+    """
+    index = models.TextField()
+    using = models.TextField(default="default")
+    object_id = models.TextField()
+    delete = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "solr_queue"
+        ordering = ('id',)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
@@ -9,6 +9,9 @@ from .Address import Address
 from .Attribute import Attribute
 from .Name import Name
 
+# First key of the two-part Postgres advisory lock taken on a topic
+TOPIC_LOCK_NAMESPACE = 0x544f42
+
 
 class Topic(Auditable):
     source_id = models.TextField()
@@ -25,6 +28,7 @@ class Topic(Auditable):
     )
 
     _active_cred_ids = None
+    _active_data = None
 
     class Meta:
         db_table = "topic"
@@ -39,6 +43,77 @@ class Topic(Auditable):
         self.full_clean()
         super(Topic, self).save(*args, **kwargs)
 
+    @classmethod
+    def lock_topics(cls, topic_ids):
+        """
+        Block competing writers to a set of topics until the current
+        transaction ends. Locks are always taken in topic ID order so that
+        concurrent transactions cannot deadlock. Uses Postgres advisory locks
+        where available so that the topic rows themselves are not locked.
+        """
+        topic_ids = sorted(set(topic_ids))
+        if not topic_ids:
+            return
+        conn = transaction.get_connection()
+        if conn.vendor == "postgresql":
+            with conn.cursor() as cursor:
+                for topic_id in topic_ids:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s, %s)",
+                        [TOPIC_LOCK_NAMESPACE, topic_id])
+        else:
+            list(cls.objects.select_for_update().filter(pk__in=topic_ids)
+                 .order_by("id").values_list("id", flat=True))
+
+    @classmethod
+    def prefetch_active_data(cls, topics):
+        """
+        Load the active credential IDs, names, addresses and attributes for
+        a list of topics with one query each, instead of per topic
+        """
+        from .ActiveTopicFact import ActiveTopicFact, active_facts_enabled
+        from .Credential import Credential
+
+        by_id = {}
+        for topic in topics:
+            if topic._active_data is None:
+                by_id.setdefault(topic.id, []).append(topic)
+        if not by_id:
+            return
+        cred_topics = dict(
+            Credential.objects.filter(topic_id__in=by_id, latest=True, revoked=False)
+            .values_list('id', 'topic_id'))
+        active_ids = {topic_id: set() for topic_id in by_id}
+        data = {
+            topic_id: {"names": [], "addresses": [], "attributes": []}
+            for topic_id in by_id
+        }
+        for cred_id, topic_id in cred_topics.items():
+            active_ids[topic_id].add(cred_id)
+        if active_facts_enabled():
+            data = ActiveTopicFact.load_for_topics(by_id)
+        elif cred_topics:
+            rows = (
+                ("names", Name.objects.all()),
+                ("addresses", Address.objects.all()),
+                ("attributes", Attribute.objects.select_related('credential')),
+            )
+            for key, queryset in rows:
+                for row in queryset.filter(credential_id__in=cred_topics):
+                    data[cred_topics[row.credential_id]][key].append(row)
+        for topic_id, instances in by_id.items():
+            for topic in instances:
+                topic._active_cred_ids = active_ids[topic_id]
+                topic._active_data = data[topic_id]
+
+    def _load_active_facts(self) -> bool:
+        # the active facts table replaces the per-topic joins when enabled
+        from .ActiveTopicFact import active_facts_enabled
+
+        if self._active_data is None and active_facts_enabled():
+            self.prefetch_active_data([self])
+        return self._active_data is not None
+
     def get_active_credential_ids(self):
         if self._active_cred_ids is None:
             self._active_cred_ids = set(self.credentials.filter(latest=True, revoked=False)\
@@ -46,18 +121,24 @@ class Topic(Auditable):
         return self._active_cred_ids
 
     def get_active_addresses(self):
+        if self._load_active_facts():
+            return self._active_data["addresses"]
         creds = self.get_active_credential_ids()
         if creds:
             return Address.objects.filter(credential_id__in=creds)
         return []
 
     def get_active_attributes(self):
+        if self._load_active_facts():
+            return self._active_data["attributes"]
         creds = self.get_active_credential_ids()
         if creds:
             return Attribute.objects.filter(credential_id__in=creds)
         return []
 
     def get_active_names(self):
+        if self._load_active_facts():
+            return self._active_data["names"]
         creds = self.get_active_credential_ids()
         if creds:
             return Name.objects.filter(credential_id__in=creds)
@@ -1,3 +1,4 @@
+from .ActiveTopicFact import ActiveTopicFact
 from .Address import Address
 from .Attribute import Attribute
 from .Claim import Claim
@@ -6,5 +7,7 @@ from .CredentialSet import CredentialSet
 from .CredentialType import CredentialType
 from .Name import Name
 from .Schema import Schema
+from .SearchIndexWatermark import SearchIndexWatermark
+from .SolrQueueEntry import SolrQueueEntry
 from .Topic import Topic
 from .TopicRelationship import TopicRelationship
@@ -0,0 +1,104 @@
+"""
+Home page statistics.
+
+The record and credential counts are computed periodically by a background
+refresher and stored in the cache (the shared cache when configured), so
+that the quickload endpoint can serve them without touching the database or
+the search index. Statistics the refresher has not updated in time are
+recomputed by the next request.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from api_v2.models.Claim import Claim
+from api_v2.models.Credential import Credential
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.models.Topic import Topic
+from api_v2.utils import model_counts, shared_cache, solr_counts
+
+LOGGER = logging.getLogger(__name__)
+
+STATS_KEY = "quickload:stats"
+REFRESH_LOCK_KEY = "quickload:refreshing"
+
+# Used for the staleness limit when the background refresher is disabled
+DEFAULT_REFRESH_INTERVAL = 300
+
+COUNT_MODELS = {
+    "claim": Claim,
+    "credential": Credential,
+    "credentialtype": CredentialType,
+    "issuer": Issuer,
+    "topic": Topic,
+}
+
+
+def get_cache():
+    return shared_cache(getattr(settings, "QUICKLOAD_CACHE_ALIAS", "shared")) \
+        or caches["default"]
+
+
+def refresh_interval() -> int:
+    return getattr(settings, "QUICKLOAD_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL)
+
+
+def stale_after() -> int:
+    """
+    The age in seconds after which the statistics are recomputed on request
+    """
+    interval = refresh_interval()
+    return 2 * (interval if interval > 0 else DEFAULT_REFRESH_INTERVAL)
+
+
+def compute_stats() -> dict:
+    with connection.cursor() as cursor:
+        counts = {name: model_counts(model, cursor) for (name, model) in COUNT_MODELS.items()}
+    return {
+        "counts": counts,
+        "credential_counts": solr_counts(),
+        "updated": time.time(),
+    }
+
+
+def refresh_stats() -> dict:
+    """
+    Recompute the statistics and store them in the cache
+    """
+    stats = compute_stats()
+    if stats["credential_counts"] is False:
+        # keep serving the previous counts while the search index is unavailable
+        previous = get_cache().get(STATS_KEY)
+        if previous:
+            stats["credential_counts"] = previous["credential_counts"]
+    get_cache().set(STATS_KEY, stats, None)
+    return stats
+
+
+def get_stats() -> dict:
+    """
+    Return the cached statistics with their age in seconds, computing them
+    when they are missing or stale
+    """
+    cache = get_cache()
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        LOGGER.info("Quickload statistics not cached, computing")
+        stats = refresh_stats()
+    elif time.time() - stats["updated"] > stale_after() and \
+            cache.add(REFRESH_LOCK_KEY, True, 60):
+        # only one request recomputes, the others serve the previous values
+        LOGGER.info("Quickload statistics are stale, recomputing")
+        try:
+            stats = refresh_stats()
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+    result = stats.copy()
+    result["age"] = max(int(time.time() - stats["updated"]), 0)
+    result["stale"] = result["age"] > stale_after()
+    return result
@@ -0,0 +1,27 @@
+import time
+
+from haystack.backends.solr_backend import SolrEngine, SolrSearchBackend
+
+from api_v2.search.requestlog import record_solr_query
+
+
+class LoggedSolrSearchBackend(SolrSearchBackend):
+    """
+    Record the Solr query time of searches in the current search request log
+    """
+
+    def search(self, query_string, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super(LoggedSolrSearchBackend, self).search(query_string, **kwargs)
+        finally:
+            record_solr_query(None, time.perf_counter() - start)
+
+    def _process_results(self, raw_results, *args, **kwargs):
+        record_solr_query(getattr(raw_results, "qtime", None))
+        return super(LoggedSolrSearchBackend, self)._process_results(
+            raw_results, *args, **kwargs)
+
+
+class LoggedSolrEngine(SolrEngine):
+    backend = LoggedSolrSearchBackend
@@ -0,0 +1,113 @@
+"""
+Short-lived caching of search API responses.
+
+Cache keys include a generation counter which is incremented whenever
+search index updates have been posted, so cached responses are dropped
+as soon as the index changes instead of waiting for the TTL to expire.
+
+Responses are only cached in a cache shared by all API processes
+(SEARCH_CACHE_ALIAS), as a process-local cache would miss the generation
+updates posted by other processes and keep serving stale results.
+"""
+
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from api_v2.search.requestlog import record_cache
+from api_v2.utils import shared_cache
+
+LOGGER = logging.getLogger(__name__)
+
+GENERATION_KEY = "search_cache:generation"
+
+_STATS_LOCK = threading.Lock()
+_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+}
+
+
+def get_cache():
+    return shared_cache(getattr(settings, "SEARCH_CACHE_ALIAS", "shared"))
+
+
+def cache_ttl() -> int:
+    return getattr(settings, "SEARCH_CACHE_TTL", 30)
+
+
+def _count(key: str):
+    with _STATS_LOCK:
+        _STATS[key] += 1
+
+
+def get_generation(cache) -> int:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = 0
+        cache.add(GENERATION_KEY, generation, None)
+    return generation
+
+
+def bump_generation():
+    """
+    Invalidate all cached search responses
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # key not present
+        cache.add(GENERATION_KEY, 1, None)
+    _count("invalidations")
+
+
+def cache_key(request, generation: int) -> str:
+    """
+    Build a cache key from the request path and normalized query parameters
+    """
+    params = []
+    for name, values in sorted(request.query_params.lists()):
+        values = [value.strip() for value in values if value.strip()]
+        if values:
+            params.append((name, values))
+    digest = hashlib.sha1(
+        repr((request.path, params)).encode("utf-8")).hexdigest()
+    return "search_cache:{}:{}".format(generation, digest)
+
+
+def cached_response(request, handler) -> Response:
+    """
+    Return a cached response for the request, or call the handler and cache
+    a successful result
+    """
+    ttl = cache_ttl()
+    cache = get_cache()
+    if not ttl or cache is None or request.method != "GET":
+        return handler()
+    key = cache_key(request, get_generation(cache))
+    data = cache.get(key)
+    if data is not None:
+        _count("hits")
+        record_cache("hit")
+        return Response(data)
+    _count("misses")
+    record_cache("miss")
+    response = handler()
+    if response.status_code == 200:
+        cache.set(key, response.data, ttl)
+    return response
+
+
+def stats() -> dict:
+    with _STATS_LOCK:
+        result = _STATS.copy()
+    lookups = result["hits"] + result["misses"]
+    result["hit_ratio"] = round(result["hits"] / lookups, 3) if lookups else 0
+    return result
@@ -2,6 +2,7 @@ import logging
 
 from django.db import transaction
 from haystack import indexes
+from haystack.utils import get_identifier
 
 LOGGER = logging.getLogger(__name__)
 
@@ -13,13 +14,35 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
         super(TxnAwareSearchIndex, self).__init__(*args, **kwargs)
         self._transaction_added = {}
         self._transaction_removed = {}
+        self._transaction_pending = {}
         self._transaction_savepts = None
 
     def reset(self):
         self._transaction_added = {}
         self._transaction_removed = {}
+        self._transaction_pending = {}
         self._transaction_savepts = None
 
+    def _persist_pending(self, using, instance, delete):
+        """
+        Record the pending update in the durable queue within the current transaction
+        """
+        queue = self._backend_queue
+        if not queue or not queue.durable:
+            return
+        key = (using, delete)
+        pending = self._transaction_pending.setdefault(key, {})
+        if instance.id not in pending:
+            object_id = get_identifier(instance) if delete else instance.id
+            pending[instance.id] = queue.persist(
+                self.__class__, using, [object_id], delete)[0]
+
+    def _pending_ids(self, using, delete):
+        pending = self._transaction_pending.get((using, delete))
+        if self._backend_queue and self._backend_queue.durable:
+            return list(pending.values()) if pending else []
+        return None
+
     def update_object(self, instance, using=None, **kwargs):
         conn = transaction.get_connection()
         if conn.in_atomic_block:
@@ -32,6 +55,7 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                 if using not in self._transaction_added:
                     self._transaction_added[using] = {}
                 self._transaction_added[using][instance.id] = instance
+                self._persist_pending(using, instance, False)
         else:
             if self._transaction_added or self._transaction_removed:
                 # previous transaction must have ended with rollback
@@ -52,6 +76,7 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
             if using not in self._transaction_removed:
                 self._transaction_removed[using] = {}
             self._transaction_removed[using][instance.id] = instance
+            self._persist_pending(using, instance, True)
         else:
             if self._transaction_added or self._transaction_removed:
                 # previous transaction must have ended with rollback
@@ -72,7 +97,9 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                 if instances:
                     LOGGER.debug("Committing %d deferred Solr delete(s) after transaction", len(instances))
                     if self._backend_queue:
-                        self._backend_queue.delete(self.__class__, using, list(instances.values()))
+                        self._backend_queue.delete(
+                            self.__class__, using, list(instances.values()),
+                            self._pending_ids(using, True))
                     else:
                         backend = self.get_backend(using)
                         if backend is not None:
@@ -82,7 +109,9 @@ class TxnAwareSearchIndex(indexes.SearchIndex):
                 if instances:
                     LOGGER.debug("Committing %d deferred Solr update(s) after transaction", len(instances))
                     if self._backend_queue:
-                        self._backend_queue.add(self.__class__, using, list(instances.values()))
+                        self._backend_queue.add(
+                            self.__class__, using, list(instances.values()),
+                            self._pending_ids(using, False))
                     else:
                         backend = self.get_backend(using)
                         if backend is not None:
@@ -0,0 +1,120 @@
+"""
+Sampled, structured logging of search API requests.
+
+Each search request collects its query parameters, the Solr query times,
+the time spent hydrating results from the database and the number of
+results. A sample of the requests (and every request slower than the slow
+threshold) is logged as a single JSON record, so that request handling does
+not depend on the size of the response.
+"""
+
+from contextlib import contextmanager
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCAL = threading.local()
+
+
+def sample_rate() -> float:
+    return getattr(settings, "SEARCH_LOG_SAMPLE_RATE", 0.05)
+
+
+def slow_threshold() -> int:
+    return getattr(settings, "SEARCH_LOG_SLOW_MS", 1000)
+
+
+class SearchRequestLog:
+    def __init__(self, view: str, request):
+        self.view = view
+        self.params = {
+            name: values if len(values) > 1 else values[0]
+            for name, values in request.query_params.lists()
+        }
+        self.solr_qtime = []
+        self.solr_ms = 0.0
+        self.hydration_ms = 0.0
+        self.result_count = None
+        self.cache = None
+        self.status = None
+        self._start = time.perf_counter()
+
+    def set_response(self, response):
+        self.status = response.status_code
+        data = getattr(response, "data", None)
+        if isinstance(data, dict):
+            if "total" in data:
+                self.result_count = data["total"]
+            elif isinstance(data.get("results"), list):
+                self.result_count = len(data["results"])
+            elif isinstance(data.get("objects"), dict):
+                self.result_count = data["objects"].get("total")
+        elif isinstance(data, list):
+            self.result_count = len(data)
+
+    def record(self) -> dict:
+        return {
+            "view": self.view,
+            "params": self.params,
+            "status": self.status,
+            "results": self.result_count,
+            "cache": self.cache,
+            "solr_qtime": self.solr_qtime,
+            "solr_ms": round(self.solr_ms, 1),
+            "hydration_ms": round(self.hydration_ms, 1),
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 1),
+        }
+
+
+def current_log():
+    return getattr(_LOCAL, "log", None)
+
+
+@contextmanager
+def search_request_log(view: str, request):
+    """
+    Collect the details of a search request, logging them when the request
+    is sampled or slow
+    """
+    log = SearchRequestLog(view, request)
+    previous = current_log()
+    _LOCAL.log = log
+    try:
+        yield log
+    finally:
+        _LOCAL.log = previous
+        record = log.record()
+        if record["total_ms"] >= slow_threshold() or random.random() < sample_rate():
+            LOGGER.info("search_request %s", json.dumps(record, default=str))
+
+
+def record_solr_query(qtime, elapsed: float = None):
+    log = current_log()
+    if log:
+        if qtime is not None:
+            log.solr_qtime.append(qtime)
+        if elapsed is not None:
+            log.solr_ms += elapsed * 1000
+
+
+def record_cache(status: str):
+    log = current_log()
+    if log:
+        log.cache = status
+
+
+@contextmanager
+def timed_hydration():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        log = current_log()
+        if log:
+            log.hydration_ms += (time.perf_counter() - start) * 1000
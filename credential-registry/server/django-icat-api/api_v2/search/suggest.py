@@ -0,0 +1,127 @@
+"""
+Lightweight name suggestions for search-as-you-type.
+
+Suggestions are answered from the edge n-gram fields populated from the
+credential names (name_suggest for word prefixes, name_prefix for prefixes
+of the whole name) and return only the stored topic ID and name, collapsed
+to one result per topic, without loading anything from the database. Solr
+is asked to stop collecting results once the latency budget is spent.
+
+Search engines other than Solr fall back to a slower database query on the
+stored names, for development and tests.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from haystack import connections
+from haystack.backends.solr_backend import SolrSearchBackend
+
+from api_v2.models.Name import Name
+from api_v2.search.requestlog import record_solr_query
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_WORDS = 10
+# maxGramSize of the edge_ngram field type used by name_suggest
+MAX_GRAM_SIZE = 15
+
+
+def latency_budget() -> int:
+    return getattr(settings, "SEARCH_SUGGEST_BUDGET_MS", 200)
+
+
+def build_suggest_query(term: str, clean) -> str:
+    """
+    Match all word prefixes of the term, ranking names which start with
+    the whole term first. Longer words are cut to the largest indexed
+    prefix, as they would not match name_suggest otherwise.
+    """
+    words = [
+        clean(word[:MAX_GRAM_SIZE]) for word in term.split() if len(word) > 1
+    ][:MAX_WORDS]
+    if not words:
+        return None
+    return 'name_suggest:({}) OR name_prefix:"{}"^10'.format(
+        " AND ".join(words), clean(" ".join(term.split())))
+
+
+def pick_name(names: list, term: str) -> str:
+    """
+    Choose the stored name of a topic which best matches the term
+    """
+    if not names:
+        return None
+    term = " ".join(term.lower().split())
+    words = term.split()
+    for name in names:
+        if name.lower().startswith(term):
+            return name
+    for name in names:
+        name_words = name.lower().split()
+        if all(any(part.startswith(word) for part in name_words) for word in words):
+            return name
+    return names[0]
+
+
+def suggest_names(term: str, limit: int = 10, using: str = "default") -> dict:
+    """
+    Return up to `limit` (topic_id, name) suggestions for a partial name
+    """
+    term = (term or "").strip()
+    backend = connections[using].get_backend()
+    if not isinstance(backend, SolrSearchBackend):
+        return suggest_from_database(term, limit)
+    query = build_suggest_query(term, connections[using].get_query().clean)
+    if not query:
+        return {"total": 0, "partial": False, "results": []}
+
+    start = time.perf_counter()
+    raw_results = backend.conn.search(
+        query,
+        fq=[
+            "django_ct:api_v2.credential",
+            "latest:true",
+            "revoked:false",
+            "{!collapse field=topic_id}",
+        ],
+        fl="topic_id,name",
+        rows=limit,
+        timeAllowed=latency_budget(),
+    )
+    elapsed = time.perf_counter() - start
+    record_solr_query(getattr(raw_results, "qtime", None), elapsed)
+
+    header = raw_results.raw_response.get("responseHeader", {})
+    partial = bool(header.get("partialResults"))
+    if partial:
+        LOGGER.info("Name suggestions for '%s' exceeded the latency budget", term)
+    results = [
+        {"topic_id": doc.get("topic_id"), "name": pick_name(doc.get("name") or [], term)}
+        for doc in raw_results.docs
+    ]
+    return {"total": raw_results.hits, "partial": partial, "results": results}
+
+
+def suggest_from_database(term: str, limit: int = 10) -> dict:
+    """
+    Return name suggestions from the database, matching names containing
+    every word of the term
+    """
+    words = [word for word in term.split() if len(word) > 1][:MAX_WORDS]
+    if not words:
+        return {"total": 0, "partial": False, "results": []}
+    query = Name.objects.filter(credential__latest=True, credential__revoked=False)
+    for word in words:
+        query = query.filter(text__icontains=word)
+    results = []
+    topic_ids = set()
+    names = query.order_by("text").values_list("credential__topic_id", "text")
+    for topic_id, name in names[:limit * 5]:
+        if topic_id not in topic_ids:
+            topic_ids.add(topic_id)
+            results.append({"topic_id": topic_id, "name": name})
+            if len(results) == limit:
+                break
+    return {"total": len(results), "partial": False, "results": results}
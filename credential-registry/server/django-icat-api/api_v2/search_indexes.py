@@ -2,19 +2,27 @@
 #       ./indices/<IndexName> instead of this default file...
 
 from itertools import chain
+import json
 import logging
 
 from haystack import indexes
+from django.conf import settings
 from django.db.models import Prefetch
 from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
 
 from api_v2.models.Credential import Credential as CredentialModel
 from api_v2.models.Name import Name as NameModel
 from api_v2.search.index import TxnAwareSearchIndex
+from api_v2.serializers.prefetch import defer_heavy_fields
 
 LOGGER = logging.getLogger(__name__)
 
 
+def stored_documents_enabled() -> bool:
+    return getattr(settings, "SEARCH_STORED_DOCUMENTS", False)
+
+
 class CredentialIndex(TxnAwareSearchIndex, indexes.Indexable):
     document = indexes.CharField(document=True, use_template=True)
 
@@ -36,6 +44,7 @@ class CredentialIndex(TxnAwareSearchIndex, indexes.Indexable):
     schema_name = indexes.CharField(model_attr="credential_type__schema__name")
     schema_version = indexes.CharField(model_attr="credential_type__schema__version")
     wallet_id = indexes.CharField(model_attr="wallet_id")
+    payload = indexes.CharField(indexed=False, null=True)
 
     @staticmethod
     def prepare_name(obj):
@@ -47,6 +56,15 @@ class CredentialIndex(TxnAwareSearchIndex, indexes.Indexable):
           "{}::{}".format(cat.type, cat.value) for cat in obj.all_categories
         ]
 
+    @staticmethod
+    def prepare_payload(obj):
+        if not stored_documents_enabled():
+            return None
+        # imported here to avoid a circular import
+        from api_v2.serializers.search import CredentialSearchPayloadSerializer
+        data = CredentialSearchPayloadSerializer(obj).data
+        return json.dumps(data, cls=JSONEncoder, separators=(",", ":"))
+
     @staticmethod
     def prepare_location(obj):
         locations = []
@@ -81,15 +99,19 @@ class CredentialIndex(TxnAwareSearchIndex, indexes.Indexable):
         queryset = super(CredentialIndex, self).index_queryset(using)\
             .prefetch_related(*prefetch)\
             .select_related(*select)
-        return queryset
+        return defer_heavy_fields(queryset, *select)
 
     def read_queryset(self, using=None):
+        prefetch = (
+            "related_topics",
+        )
         select = (
             "credential_type__issuer",
         )
         queryset = self.index_queryset(using) \
+            .prefetch_related(*prefetch) \
             .select_related(*select)
-        return queryset
+        return defer_heavy_fields(queryset, *select)
 
     def get_updated_field(self):
       return "update_timestamp"
@@ -0,0 +1,159 @@
+"""
+Plan the related-object loading needed by nested model serializers.
+
+Walks a serializer tree and derives the select_related and prefetch_related
+paths matching its nested relations, so that serializing a list of objects
+runs a fixed number of queries regardless of its length. Heavy columns the
+serializer does not render are deferred.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import ListSerializer, ModelSerializer
+
+from api_v2.models.Topic import Topic
+
+
+def _relation(model, source):
+    if not source or "." in source or source == "*":
+        return None
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def plan_prefetch(serializer, model=None, prefix="", many=False) -> (list, list):
+    """
+    Return the (select_related, prefetch_related) paths for a serializer
+    class or instance
+    """
+    select = []
+    prefetch = []
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if model is None:
+        model = serializer.Meta.model
+    for field in serializer.fields.values():
+        if isinstance(field, ManyRelatedField):
+            # related primary keys
+            if _relation(model, field.source):
+                prefetch.append(prefix + field.source)
+            continue
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(nested, ModelSerializer):
+            continue
+        relation = _relation(model, field.source)
+        if not relation:
+            # relations provided by methods are loaded separately
+            continue
+        path = prefix + field.source
+        to_many = many or relation.many_to_many or relation.one_to_many
+        if to_many:
+            prefetch.append(path)
+        else:
+            select.append(path)
+        sub_select, sub_prefetch = plan_prefetch(
+            nested, relation.related_model, path + "__", to_many)
+        select.extend(sub_select)
+        prefetch.extend(sub_prefetch)
+    return select, prefetch
+
+
+def plan_deferred(serializer, model=None, prefix="") -> list:
+    """
+    Return the heavy columns (listed in the model's DEFERRED_FIELDS) of the
+    root and select_related models which a serializer does not render
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if model is None:
+        model = serializer.Meta.model
+    rendered = {field.source for field in serializer.fields.values()}
+    deferred = [
+        prefix + name for name in getattr(model, "DEFERRED_FIELDS", ())
+        if name not in rendered
+    ]
+    for field in serializer.fields.values():
+        if not isinstance(field, ModelSerializer):
+            continue
+        relation = _relation(model, field.source)
+        if relation and not (relation.many_to_many or relation.one_to_many):
+            deferred.extend(plan_deferred(
+                field, relation.related_model, prefix + field.source + "__"))
+    return deferred
+
+
+def defer_heavy_fields(queryset, *paths):
+    """
+    Defer the heavy columns of the queryset model and of the models
+    reached through the given select_related paths
+    """
+    deferred = []
+    for path in ("",) + paths:
+        model = queryset.model
+        for name in filter(None, path.split("__")):
+            model = model._meta.get_field(name).related_model
+        prefix = path + "__" if path else ""
+        deferred.extend(prefix + name for name in getattr(model, "DEFERRED_FIELDS", ()))
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+def prefetch_for_serializer(queryset, serializer):
+    """
+    Apply the related-object loading planned for a serializer to a queryset,
+    deferring heavy columns it does not render
+    """
+    select, prefetch = plan_prefetch(serializer, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    deferred = plan_deferred(serializer, queryset.model)
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    return queryset
+
+
+def _prefetched(instance, name) -> bool:
+    return name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def _credential_topics(credential, depth=0):
+    # only follow relations already loaded for the serializer
+    if type(credential).topic.is_cached(credential):
+        yield credential.topic
+    if _prefetched(credential, "related_topics"):
+        yield from credential.related_topics.all()
+    if depth == 0 and credential.credential_set_id and \
+            type(credential).credential_set.is_cached(credential) and \
+            _prefetched(credential.credential_set, "credentials"):
+        for member in credential.credential_set.credentials.all():
+            yield from _credential_topics(member, depth + 1)
+
+
+def hydrate_credential_topics(credentials):
+    """
+    Load the active names, addresses and attributes for all topics
+    referenced by a list of prefetched credentials
+    """
+    topics = []
+    for credential in credentials:
+        topics.extend(_credential_topics(credential))
+    Topic.prefetch_active_data(topics)
+    return credentials
+
+
+def hydrate_credential_set_topics(credential_sets):
+    """
+    Load the active topic data for a list of prefetched credential sets
+    """
+    topics = []
+    for cred_set in credential_sets:
+        if not _prefetched(cred_set, "credentials"):
+            continue
+        for credential in cred_set.credentials.all():
+            topics.extend(_credential_topics(credential, 1))
+    Topic.prefetch_active_data(topics)
+    return credential_sets
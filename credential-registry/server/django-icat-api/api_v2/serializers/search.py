@@ -2,11 +2,13 @@
 
 from collections import OrderedDict
 from datetime import datetime, timedelta
+import json
 import logging
+import threading
 
 from django.db.models.manager import Manager
 
-from rest_framework.serializers import ListSerializer, SerializerMethodField
+from rest_framework.serializers import BaseSerializer, ListSerializer, SerializerMethodField
 from rest_framework.utils.serializer_helpers import ReturnDict
 from drf_haystack.serializers import (
     FacetFieldSerializer,
@@ -31,6 +33,7 @@ from api_v2.serializers.rest import (
     CredentialNamedTopicSerializer,
 )
 
+from api_v2.models.ActiveTopicFact import ActiveTopicFact, active_facts_enabled
 from api_v2.models.Address import Address
 from api_v2.models.Attribute import Attribute
 from api_v2.models.Credential import Credential
@@ -38,11 +41,47 @@ from api_v2.models.CredentialType import CredentialType
 from api_v2.models.Issuer import Issuer
 from api_v2.models.Name import Name
 from api_v2 import utils
+from api_v2.serializers.prefetch import hydrate_credential_topics, prefetch_for_serializer
 
 from api_v2.search_indexes import CredentialIndex
 
 logger = logging.getLogger(__name__)
 
+# Models and fields providing the display text for facet values
+FACET_LABEL_FIELDS = {
+    "issuer_id": (Issuer, "name"),
+    "credential_type_id": (CredentialType, "description"),
+}
+
+_FACET_LABELS = utils.VersionedCache("facet_labels:version")
+_FACET_LABELS_LOCK = threading.Lock()
+
+
+def get_facet_labels(field_name, values) -> dict:
+    """
+    Look up the display text for a set of facet values, loading any
+    labels not already cached with a single query
+    """
+    model_cls, label_field = FACET_LABEL_FIELDS[field_name]
+    cached = _FACET_LABELS.values()
+    with _FACET_LABELS_LOCK:
+        labels = cached.setdefault(field_name, {})
+        missing = [value for value in values if value not in labels]
+    if missing:
+        rows = model_cls.objects.only(label_field).in_bulk(missing)
+        with _FACET_LABELS_LOCK:
+            for pk, row in rows.items():
+                labels[pk] = getattr(row, label_field)
+    return {value: labels.get(value) for value in values}
+
+
+def clear_facet_labels():
+    """
+    Reset the facet label cache in all processes, called when issuers are
+    registered
+    """
+    _FACET_LABELS.clear()
+
 
 class SearchResultsListSerializer(ListSerializer):
     @staticmethod
@@ -155,30 +194,46 @@ class CustomTopicSerializer(TopicSerializer):
             "attributes",
         )
 
+    def _active_facts(self, obj, key):
+        # one query for all the facts of the topic, shared by the fields
+        if getattr(obj, "_formatted_facts", None) is None:
+            obj._formatted_facts = ActiveTopicFact.load_for_topics(
+                [obj.id], with_issuers=True)[obj.id]
+        return sorted(obj._formatted_facts[key], key=lambda row: row.credential.inactive)
+
     def get_names(self, obj):
-        names = Name.objects.filter(
-            credential__topic=obj,
-            credential__latest=True,
-            credential__revoked=False,
-        ).order_by('credential__inactive')
+        if active_facts_enabled():
+            names = self._active_facts(obj, "names")
+        else:
+            names = Name.objects.filter(
+                credential__topic=obj,
+                credential__latest=True,
+                credential__revoked=False,
+            ).order_by('credential__inactive')
         serializer = CustomNameSerializer(instance=names, many=True)
         return serializer.data
 
     def get_addresses(self, obj):
-        addresses = Address.objects.filter(
-            credential__topic=obj,
-            credential__latest=True,
-            credential__revoked=False,
-        ).order_by('credential__inactive')
+        if active_facts_enabled():
+            addresses = self._active_facts(obj, "addresses")
+        else:
+            addresses = Address.objects.filter(
+                credential__topic=obj,
+                credential__latest=True,
+                credential__revoked=False,
+            ).order_by('credential__inactive')
         serializer = CustomAddressSerializer(instance=addresses, many=True)
         return serializer.data
 
     def get_attributes(self, obj):
-        attributes = Attribute.objects.filter(
-            credential__topic=obj,
-            credential__latest=True,
-            credential__revoked=False,
-        ).order_by('credential__inactive')
+        if active_facts_enabled():
+            attributes = self._active_facts(obj, "attributes")
+        else:
+            attributes = Attribute.objects.filter(
+                credential__topic=obj,
+                credential__latest=True,
+                credential__revoked=False,
+            ).order_by('credential__inactive')
         serializer = CustomAttributeSerializer(instance=attributes, many=True)
         return serializer.data
 
@@ -229,6 +284,107 @@ class CredentialSearchSerializer(HaystackSerializerMixin, CredentialSerializer):
         }
 
 
+# Nested records which change without the credential being reindexed. They
+# are left out of the stored documents and loaded when results are served
+STORED_DOCUMENT_RELATIONS = ("credential_set", "credential_type", "related_topics")
+
+
+class CredentialSearchPayloadSerializer(CredentialSerializer):
+    """
+    Produces the output of CredentialSearchSerializer from a Credential
+    model instance, to be stored in the search index, leaving out the
+    STORED_DOCUMENT_RELATIONS
+    """
+    addresses = CredentialAddressSerializer(many=True)
+    attributes = CredentialAttributeSerializer(many=True)
+    names = CredentialNameSerializer(many=True)
+    topic = CredentialTopicSerializer()
+
+    class Meta(CredentialSerializer.Meta):
+        fields = tuple(
+            field for field in CredentialSearchSerializer.Meta.fields
+            if field not in STORED_DOCUMENT_RELATIONS
+        )
+
+
+class CredentialStoredRelationsSerializer(CredentialSerializer):
+    """
+    The STORED_DOCUMENT_RELATIONS of a credential search result
+    """
+    credential_set = CredentialSetSerializer()
+    credential_type = CredentialTypeSerializer()
+    related_topics = CredentialNamedTopicSerializer(many=True)
+
+    class Meta(CredentialSerializer.Meta):
+        fields = ("id",) + STORED_DOCUMENT_RELATIONS
+
+
+class StoredDocumentListSerializer(ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, Manager) else data
+        return self.child.represent_all(list(iterable))
+
+
+class StoredDocumentSerializer(BaseSerializer):
+    """
+    Returns the pre-serialized document stored with a search result,
+    limited to the fields of `fallback_class`, adding the fields returned
+    by load_related for the whole page. Results indexed without a stored
+    document are serialized from the database instead. Subclasses share
+    the Meta options of the fallback serializer.
+    """
+    fallback_class = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        kwargs["child"] = cls(context=kwargs.get("context"))
+        return StoredDocumentListSerializer(*args, **kwargs)
+
+    def load_related(self, instances) -> dict:
+        """
+        Return the fields not stored in the documents, keyed by result ID
+        """
+        return {}
+
+    def represent_all(self, instances) -> list:
+        stored = [instance for instance in instances if getattr(instance, "payload", None)]
+        related = self.load_related(stored) if stored else {}
+        result = []
+        for instance in instances:
+            payload = getattr(instance, "payload", None)
+            if not payload:
+                result.append(self.fallback_class(instance, context=self.context).data)
+                continue
+            data = json.loads(payload, object_pairs_hook=OrderedDict)
+            data.update(related.get(int(instance.pk), {}))
+            result.append(OrderedDict(
+                (field, data[field]) for field in self.Meta.fields
+                if field in data
+            ))
+        return result
+
+    def to_representation(self, instance):
+        return self.represent_all([instance])[0]
+
+
+class CredentialStoredSearchSerializer(StoredDocumentSerializer):
+    fallback_class = CredentialSearchSerializer
+
+    class Meta(CredentialSearchSerializer.Meta):
+        pass
+
+    def load_related(self, instances) -> dict:
+        credentials = prefetch_for_serializer(
+            Credential.objects.filter(id__in=[int(instance.pk) for instance in instances]),
+            CredentialStoredRelationsSerializer,
+        )
+        hydrate_credential_topics(credentials)
+        return {
+            credential.id: CredentialStoredRelationsSerializer(credential).data
+            for credential in credentials
+        }
+
+
 class CredentialAutocompleteSerializer(HaystackSerializerMixin, CredentialSerializer):
     names = CredentialNameSerializer(many=True)
 
@@ -243,6 +399,13 @@ class CredentialAutocompleteSerializer(HaystackSerializerMixin, CredentialSerial
         }
 
 
+class CredentialStoredAutocompleteSerializer(StoredDocumentSerializer):
+    fallback_class = CredentialAutocompleteSerializer
+
+    class Meta(CredentialAutocompleteSerializer.Meta):
+        pass
+
+
 class CredentialTopicSearchSerializer(CredentialSearchSerializer):
     """
     Return credentials with addresses and attributes removed, but
@@ -309,14 +472,14 @@ class CredentialFacetSerializer(HaystackFacetSerializer):
         return result
 
     def format_facets(self, field_name, facets):
+        labels = None
+        if field_name in FACET_LABEL_FIELDS:
+            labels = get_facet_labels(field_name, [int(facet[0]) for facet in facets])
         result = []
         for facet in facets:
             row = {'value': facet[0], 'count': facet[1]}
-            # naive method - can be optimized
-            if field_name == "issuer_id":
-                row['text'] = Issuer.objects.get(pk=row['value']).name
-            elif field_name == "credential_type_id":
-                row['text'] = CredentialType.objects.get(pk=row['value']).description
+            if labels is not None:
+                row['text'] = labels[int(facet[0])]
             result.append(row)
         return result
 
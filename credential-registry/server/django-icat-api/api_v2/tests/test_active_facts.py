@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from api_v2.models.ActiveTopicFact import ActiveTopicFact
+from api_v2.models.Address import Address
+from api_v2.models.Attribute import Attribute
+from api_v2.models.Credential import Credential
+from api_v2.models.Name import Name
+from api_v2.models.Topic import Topic
+
+from api_indy.indy.credential import CredentialManager
+
+from .utils import create_credential_type
+
+START_DATE = datetime(2018, 1, 1, tzinfo=timezone.utc)
+
+
+def ingest(credential_type, source_id: str, day: int) -> Credential:
+    """
+    Store a credential with its search models, then assign it to a credential
+    set and revise the active facts as the CredentialManager does
+    """
+    topic, _created = Topic.objects.get_or_create(source_id=source_id, type="registration")
+    credential = Credential.objects.create(
+        topic=topic,
+        credential_type=credential_type,
+        wallet_id="wallet-{}-{}".format(source_id, Credential.objects.count()),
+        effective_date=START_DATE + timedelta(days=day),
+    )
+    Name.objects.create(credential=credential, text="{} day {}".format(source_id, day))
+    Address.objects.create(credential=credential, city="City {}".format(day), country="CA")
+    Attribute.objects.create(
+        credential=credential, type="entity_status", format="category", value="ACT")
+    with transaction.atomic():
+        CredentialManager.lock_topic(topic.id)
+        cred_set = CredentialManager.update_credential_set(credential_type, credential)
+        ActiveTopicFact.update_credentials([credential.id], [cred_set.id])
+    return credential
+
+
+@override_settings(ACTIVE_TOPIC_FACTS=True)
+class ActiveTopicFactTestCase(TestCase):
+    """
+    The incrementally maintained facts match the active search models and a
+    full rebuild of the topic
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_types = [create_credential_type(index) for index in (1, 2)]
+
+    def live_facts(self, topic_id: int) -> set:
+        active = {"credential__topic_id": topic_id,
+                  "credential__latest": True, "credential__revoked": False}
+        return {
+            (kind, row.id, row.credential_id)
+            for kind, rows in (
+                ("name", Name.objects.filter(**active)),
+                ("address", Address.objects.filter(**active)),
+                ("attribute", Attribute.objects.filter(**active)),
+            )
+            for row in rows
+        }
+
+    def stored_facts(self, topic_id: int) -> list:
+        return sorted(
+            (fact.kind, fact.fact_id, fact.credential_id, fact.credential_type_id,
+             fact.issuer_id, fact.effective_date, fact.inactive, sorted(fact.data.items()))
+            for fact in ActiveTopicFact.objects.filter(topic_id=topic_id)
+        )
+
+    def assert_facts_current(self, credential: Credential):
+        topic_id = credential.topic_id
+        stored = self.stored_facts(topic_id)
+        self.assertEqual({row[:3] for row in stored}, self.live_facts(topic_id))
+        self.assertEqual(len(stored), len(self.live_facts(topic_id)))
+        ActiveTopicFact.refresh_topics([topic_id])
+        self.assertEqual(self.stored_facts(topic_id), stored)
+
+    def test_in_order(self):
+        for day in (1, 2, 3):
+            credential = ingest(self.credential_types[0], "BC0001", day)
+            self.assert_facts_current(credential)
+        self.assertEqual(
+            {fact.credential_id for fact in ActiveTopicFact.objects.all()}, {credential.id})
+
+    def test_out_of_order(self):
+        latest = ingest(self.credential_types[0], "BC0002", 3)
+        for day in (1, 2):
+            credential = ingest(self.credential_types[0], "BC0002", day)
+            self.assertTrue(Credential.objects.get(id=credential.id).revoked)
+            self.assert_facts_current(credential)
+        self.assertEqual(
+            {fact.credential_id for fact in ActiveTopicFact.objects.all()}, {latest.id})
+
+    def test_credential_sets(self):
+        ingest(self.credential_types[0], "BC0003", 1)
+        second = ingest(self.credential_types[1], "BC0003", 2)
+        self.assert_facts_current(second)
+        replaced = ingest(self.credential_types[0], "BC0003", 3)
+        self.assert_facts_current(replaced)
+        self.assertEqual(
+            {fact.credential_id for fact in ActiveTopicFact.objects.all()},
+            {second.id, replaced.id})
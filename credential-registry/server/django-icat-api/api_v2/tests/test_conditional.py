@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+
+from .utils import create_credential, create_credential_type
+
+
+class ConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_type = create_credential_type()
+        cls.issuer = cls.credential_type.issuer
+        create_credential(cls.credential_type, "BC0001")
+
+    def test_not_modified(self):
+        url = "/api/v2/issuer/{}".format(self.issuer.id)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_related_change(self):
+        url = "/api/v2/issuer/{}".format(self.issuer.id)
+        etag = self.client.get(url)["ETag"]
+        CredentialType.objects.get(id=self.credential_type.id).save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_validated_against_related(self):
+        url = "/api/v2/credentialtype"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Issuer.objects.get(id=self.issuer.id).save()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unscoped_list_not_validated(self):
+        for url in ("/api/v2/topic", "/api/v2/credential", "/api/v2/credential/active"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header("ETag"))
+
+    def test_detail_action_validated(self):
+        topic_id = self.credential_type.credentials.first().topic_id
+        response = self.client.get("/api/v2/topic/{}/credential".format(topic_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+
+    def test_invalid_id(self):
+        for url in ("/api/v2/issuer/abc", "/api/v2/credentialtype/abc", "/api/v2/topic/abc"):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_missing_object(self):
+        response = self.client.get("/api/v2/issuer/0")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,54 @@
+from django.test import TestCase, override_settings
+
+from api_v2.models.Credential import Credential
+from api_v2.search_indexes import CredentialIndex
+
+from .utils import create_credential, create_credential_type
+
+
+@override_settings(SEARCH_STORED_DOCUMENTS=False)
+class CredentialIndexQueryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        credential_type = create_credential_type()
+        for index in range(5):
+            create_credential(credential_type, "BC000{}".format(index))
+
+    def prepare_all(self, index, credentials):
+        for credential in credentials:
+            index.prepare_name(credential)
+            index.prepare_category(credential)
+            index.prepare_location(credential)
+
+    def test_all_categories_cached(self):
+        credential = Credential.objects.first()
+        with self.assertNumQueries(1):
+            categories = credential.all_categories
+            self.assertEqual(credential.all_categories, categories)
+        self.assertEqual(
+            [(cat.type, cat.value) for cat in categories], [("entity_status", "ACT")])
+
+    def test_cached_values_are_lazy(self):
+        credential = Credential.objects.first()
+        with self.assertNumQueries(0):
+            credential.all_names
+            credential.all_attributes
+
+    def test_all_categories_prefetched(self):
+        credential = Credential.objects.prefetch_related("attributes").first()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(credential.all_categories), 1)
+
+    def test_index_queryset_fixed_queries(self):
+        index = CredentialIndex()
+        # credentials, then prefetched addresses, attributes and names
+        with self.assertNumQueries(4):
+            credentials = list(index.index_queryset())
+            self.prepare_all(index, credentials)
+        self.assertEqual(len(credentials), 5)
+
+    def test_index_queryset_does_not_grow(self):
+        index = CredentialIndex()
+        create_credential(Credential.objects.first().credential_type, "BC0009")
+        with self.assertNumQueries(4):
+            self.prepare_all(index, list(index.index_queryset()))
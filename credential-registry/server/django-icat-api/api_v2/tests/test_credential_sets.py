@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_v2.models.Credential import Credential
+from api_v2.models.CredentialSet import CredentialSet
+from api_v2.models.Topic import Topic
+
+from api_indy.indy.credential import CredentialManager
+
+from .utils import create_credential_type
+
+START_DATE = datetime(2018, 1, 1, tzinfo=timezone.utc)
+
+
+class CredentialSetUpdateTestCase(TestCase):
+    """
+    Revising a credential set runs the same number of queries for any
+    number of members, on both the in-order and the out-of-order path
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_type = create_credential_type()
+
+    def create_set(self, source_id: str, size: int, revoked: bool = True) -> CredentialSet:
+        """
+        Create a credential set with members effective on days 1 to `size`,
+        where the last member is the latest credential. Earlier members are
+        left unrevoked unless `revoked` is set.
+        """
+        topic = Topic.objects.create(source_id=source_id, type="registration")
+        dates = [START_DATE + timedelta(days=day) for day in range(1, size + 1)]
+        Credential.objects.bulk_create([
+            Credential(
+                topic=topic,
+                credential_type=self.credential_type,
+                wallet_id="wallet-{}-{}".format(source_id, pos),
+                effective_date=date,
+                latest=pos == size - 1,
+                revoked=revoked and pos < size - 1,
+                revoked_date=dates[pos + 1] if revoked and pos < size - 1 else None,
+            )
+            for pos, date in enumerate(dates)
+        ])
+        credentials = topic.credentials.order_by("effective_date")
+        cred_set = CredentialSet.objects.create(
+            credential_type=self.credential_type,
+            topic=topic,
+            latest_credential=credentials.last(),
+            first_effective_date=dates[0],
+        )
+        credentials.update(credential_set=cred_set)
+        return cred_set
+
+    def add_credential(self, cred_set: CredentialSet, day: float) -> (Credential, int):
+        """
+        Add a credential to the set, returning it with the number of queries run
+        """
+        credential = Credential.objects.create(
+            topic=cred_set.topic,
+            credential_type=self.credential_type,
+            wallet_id="wallet-{}-new".format(cred_set.topic.source_id),
+            effective_date=START_DATE + timedelta(days=day),
+        )
+        credential = Credential.objects.get(id=credential.id)
+        with CaptureQueriesContext(connection) as context:
+            CredentialManager.update_credential_set(self.credential_type, credential)
+        return credential, len(context.captured_queries)
+
+    def unrevoked(self, cred_set: CredentialSet) -> set:
+        return set(cred_set.credentials.filter(revoked=False).values_list("id", flat=True))
+
+    def test_in_order(self):
+        counts = []
+        for size in (2, 200):
+            cred_set = self.create_set("BC{}".format(size), size)
+            credential, queries = self.add_credential(cred_set, size + 1)
+            counts.append(queries)
+            self.assertTrue(credential.latest)
+            self.assertEqual(self.unrevoked(cred_set), {credential.id})
+            self.assertEqual(
+                CredentialSet.objects.get(id=cred_set.id).latest_credential_id, credential.id)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_out_of_order(self):
+        counts = []
+        for size in (2, 200):
+            # every member before the latest one is still unrevoked
+            cred_set = self.create_set("BC{}".format(size), size, revoked=False)
+            latest = cred_set.latest_credential
+            credential, queries = self.add_credential(cred_set, size - 0.5)
+            counts.append(queries)
+            self.assertFalse(credential.latest)
+            self.assertTrue(credential.revoked)
+            self.assertEqual(credential.revoked_by_id, latest.id)
+            self.assertEqual(self.unrevoked(cred_set), {latest.id})
+            self.assertFalse(Credential.objects.filter(
+                credential_set=cred_set, latest=True).exclude(id=latest.id).exists())
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,53 @@
+from django.test import TestCase, override_settings
+
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.serializers.search import clear_facet_labels, get_facet_labels
+
+from .utils import create_credential_type
+
+
+class FacetLabelQueryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.types = [create_credential_type(index) for index in range(1, 5)]
+        cls.issuer_ids = [credential_type.issuer_id for credential_type in cls.types]
+
+    def setUp(self):
+        clear_facet_labels()
+
+    def test_labels_loaded_with_one_query(self):
+        with self.assertNumQueries(1):
+            labels = get_facet_labels("issuer_id", self.issuer_ids)
+        self.assertEqual(
+            labels, {issuer.id: issuer.name for issuer in Issuer.objects.all()})
+
+    def test_labels_cached(self):
+        get_facet_labels("credential_type_id", [self.types[0].id])
+        # only the uncached labels are loaded
+        with self.assertNumQueries(1):
+            get_facet_labels("credential_type_id", [cred_type.id for cred_type in self.types])
+        with self.assertNumQueries(0):
+            labels = get_facet_labels("credential_type_id", [self.types[1].id])
+        self.assertEqual(labels, {self.types[1].id: "Credential type 2"})
+
+    def test_clear_facet_labels(self):
+        get_facet_labels("issuer_id", self.issuer_ids)
+        Issuer.objects.filter(id=self.issuer_ids[0]).update(name="Renamed")
+        clear_facet_labels()
+        with self.assertNumQueries(1):
+            labels = get_facet_labels("issuer_id", self.issuer_ids[:1])
+        self.assertEqual(labels, {self.issuer_ids[0]: "Renamed"})
+
+    def test_labels_expire(self):
+        get_facet_labels("issuer_id", self.issuer_ids)
+        CredentialType.objects.filter(id=self.types[0].id).update(description="Updated")
+        with override_settings(LOCAL_CACHE_TTL=0):
+            with self.assertNumQueries(1):
+                labels = get_facet_labels("credential_type_id", [self.types[0].id])
+        self.assertEqual(labels, {self.types[0].id: "Updated"})
+
+    def test_unknown_values(self):
+        with self.assertNumQueries(1):
+            labels = get_facet_labels("issuer_id", [0])
+        self.assertEqual(labels, {0: None})
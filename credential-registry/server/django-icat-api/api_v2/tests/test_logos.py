@@ -0,0 +1,84 @@
+import base64
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_v2.logos import LOGO_SECURITY_HEADERS, sniff_content_type
+from api_v2.models.Issuer import Issuer
+
+from .utils import create_credential_type
+
+PNG_LOGO = b"\x89PNG\r\n\x1a\n" + b"\x00" * 16
+SVG_LOGO = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+
+
+def encode_logo(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+class LogoResponseTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_type = create_credential_type()
+        cls.issuer = cls.credential_type.issuer
+        cls.issuer.logo_b64 = encode_logo(PNG_LOGO)
+        cls.issuer.save()
+
+    def set_logo(self, value):
+        # saving updates the timestamp identifying the cached logo
+        issuer = Issuer.objects.get(id=self.issuer.id)
+        issuer.logo_b64 = value
+        issuer.save()
+
+    def test_sniff_content_type(self):
+        self.assertEqual(sniff_content_type(PNG_LOGO), "image/png")
+        self.assertEqual(sniff_content_type(SVG_LOGO), "image/svg+xml")
+        self.assertEqual(sniff_content_type(b"<html>"), "application/octet-stream")
+
+    def test_issuer_logo(self):
+        response = self.client.get("/api/v2/issuer/{}/logo".format(self.issuer.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response.content, PNG_LOGO)
+        for name, value in LOGO_SECURITY_HEADERS.items():
+            self.assertEqual(response[name], value)
+
+    def test_credential_type_falls_back_to_issuer(self):
+        response = self.client.get(
+            "/api/v2/credentialtype/{}/logo".format(self.credential_type.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, PNG_LOGO)
+
+    def test_svg_logo_sandboxed(self):
+        self.set_logo(encode_logo(SVG_LOGO))
+        response = self.client.get("/api/v2/issuer/{}/logo".format(self.issuer.id))
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn("sandbox", response["Content-Security-Policy"])
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+
+    def test_not_modified_without_loading_logo(self):
+        url = "/api/v2/issuer/{}/logo".format(self.issuer.id)
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertFalse(any("logo_b64" in query["sql"] for query in context.captured_queries))
+
+    def test_updated_logo(self):
+        url = "/api/v2/issuer/{}/logo".format(self.issuer.id)
+        etag = self.client.get(url)["ETag"]
+        self.set_logo(encode_logo(SVG_LOGO))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.content, SVG_LOGO)
+
+    def test_missing_logo(self):
+        self.set_logo(None)
+        for url in ("/api/v2/issuer/{}/logo".format(self.issuer.id),
+                    "/api/v2/issuer/0/logo",
+                    "/api/v2/issuer/abc/logo"):
+            self.assertEqual(self.client.get(url).status_code, 404)
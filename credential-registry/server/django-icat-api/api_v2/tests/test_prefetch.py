@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_v2.models.Credential import Credential
+from api_v2.models.Topic import Topic
+from api_v2.serializers.prefetch import plan_prefetch
+from api_v2.serializers.rest import ExpandedCredentialSerializer
+from api_v2.serializers.search import CredentialTopicSearchSerializer
+from api_v2.views.search import (
+    CredentialSearchView,
+    CredentialTopicSearchView,
+    TopicSearchQuerySet,
+)
+
+from .utils import create_credential, create_credential_type
+
+
+class PlanPrefetchTestCase(TestCase):
+    def test_expanded_credential_plan(self):
+        select, prefetch = plan_prefetch(ExpandedCredentialSerializer)
+        self.assertIn("credential_type", select)
+        self.assertIn("credential_type__issuer", select)
+        self.assertIn("topic", select)
+        for path in ("addresses", "attributes", "names", "related_topics"):
+            self.assertIn(path, prefetch)
+        # nothing reached through a to-many relation is joined
+        for path in select:
+            self.assertFalse(path.startswith(tuple(prefetch)))
+
+
+class TopicListingQueryTestCase(TestCase):
+    """
+    The topic listings run the same number of queries for any number of
+    credentials
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_types = [create_credential_type(index) for index in range(1, 6)]
+        parent = create_credential(cls.credential_types[0], "BC0000")
+        cls.single = create_credential(
+            cls.credential_types[0], "BC0001", related_topics=[parent.topic]).topic
+        for credential_type in cls.credential_types:
+            cls.many = create_credential(
+                credential_type, "BC0002", related_topics=[parent.topic]).topic
+
+    def count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_fixed_queries(self, path: str):
+        single = self.count_queries("/api/v2/topic/{}/{}".format(self.single.id, path))
+        many = self.count_queries("/api/v2/topic/{}/{}".format(self.many.id, path))
+        self.assertEqual(single, many)
+
+    def test_topics(self):
+        self.assertEqual(self.many.credentials.count(), len(self.credential_types))
+        self.assertEqual(Topic.objects.count(), 3)
+
+    def test_list_credentials(self):
+        self.assert_fixed_queries("credential")
+
+    def test_list_active_credentials(self):
+        self.assert_fixed_queries("credential/active")
+
+    def test_list_credential_sets(self):
+        self.assert_fixed_queries("credentialset")
+
+
+class SearchResult:
+    """
+    Stands in for a search result loaded from the database
+    """
+
+    def __init__(self, credential):
+        self.pk = str(credential.id)
+        self.object = credential
+
+    def __getattr__(self, name):
+        return getattr(self.object, name)
+
+
+class TopicSearchQueryTestCase(TestCase):
+    """
+    Topic search pages are loaded and hydrated with the same number of
+    queries for any number of results
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        credential_types = [create_credential_type(index) for index in range(1, 6)]
+        parent = create_credential(credential_types[0], "BC0000")
+        for index in range(1, 11):
+            for credential_type in credential_types[:1 + index % 5]:
+                create_credential(
+                    credential_type, "BC{:04}".format(index), related_topics=[parent.topic])
+
+    def count_queries(self, size: int) -> int:
+        ids = Credential.objects.exclude(topic__source_id="BC0000")\
+            .order_by("id").values_list("id", flat=True)[:size]
+        queryset = TopicSearchQuerySet().topic_queryset()
+        with CaptureQueriesContext(connection) as context:
+            results = [SearchResult(credential) for credential in queryset.filter(id__in=ids)]
+            with mock.patch.object(
+                    CredentialSearchView, "paginate_queryset", return_value=results):
+                page = CredentialTopicSearchView().paginate_queryset(None)
+            data = CredentialTopicSearchSerializer(page, many=True).data
+        self.assertEqual(len(page), size)
+        self.assertTrue(data)
+        return len(context.captured_queries)
+
+    def test_fixed_queries(self):
+        self.assertEqual(self.count_queries(1), self.count_queries(20))
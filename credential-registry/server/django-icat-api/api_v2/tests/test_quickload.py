@@ -0,0 +1,75 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api_v2 import quickload
+
+from .utils import create_credential, create_credential_type
+
+SOLR_COUNTS = {"active": 2, "registrations": 2, "last_month": 2, "last_week": 1}
+
+
+@override_settings(OPTIMIZE_TABLE_ROW_COUNTS=False, QUICKLOAD_REFRESH_INTERVAL=60)
+@mock.patch("api_v2.quickload.solr_counts", return_value=SOLR_COUNTS)
+class QuickloadStatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.credential_type = create_credential_type()
+        create_credential(cls.credential_type, "BC0001")
+
+    def setUp(self):
+        quickload.get_cache().delete(quickload.STATS_KEY)
+        quickload.get_cache().delete(quickload.REFRESH_LOCK_KEY)
+
+    def age_stats(self, seconds: int):
+        cache = quickload.get_cache()
+        stats = cache.get(quickload.STATS_KEY)
+        stats["updated"] -= seconds
+        cache.set(quickload.STATS_KEY, stats, None)
+
+    def test_computed_when_missing(self, _solr_counts):
+        stats = quickload.get_stats()
+        self.assertEqual(stats["counts"]["topic"], 1)
+        self.assertEqual(stats["counts"]["credential"], 1)
+        self.assertEqual(stats["credential_counts"], SOLR_COUNTS)
+        self.assertFalse(stats["stale"])
+
+    def test_cached(self, solr_counts):
+        quickload.get_stats()
+        create_credential(self.credential_type, "BC0002")
+        stats = quickload.get_stats()
+        self.assertEqual(stats["counts"]["topic"], 1)
+        self.assertEqual(solr_counts.call_count, 1)
+
+    def test_stale_recomputed(self, _solr_counts):
+        quickload.get_stats()
+        create_credential(self.credential_type, "BC0002")
+        self.age_stats(quickload.stale_after() + 1)
+        stats = quickload.get_stats()
+        self.assertEqual(stats["counts"]["topic"], 2)
+        self.assertFalse(stats["stale"])
+        self.assertIsNone(quickload.get_cache().get(quickload.REFRESH_LOCK_KEY))
+
+    def test_stale_served_while_refreshing(self, _solr_counts):
+        quickload.get_stats()
+        self.age_stats(quickload.stale_after() + 1)
+        quickload.get_cache().add(quickload.REFRESH_LOCK_KEY, True, 60)
+        stats = quickload.get_stats()
+        self.assertTrue(stats["stale"])
+        self.assertGreater(stats["age"], quickload.stale_after())
+
+    def test_previous_counts_kept_without_index(self, solr_counts):
+        quickload.get_stats()
+        solr_counts.return_value = False
+        stats = quickload.refresh_stats()
+        self.assertEqual(stats["credential_counts"], SOLR_COUNTS)
+        self.assertLess(time.time() - stats["updated"], 60)
+
+    def test_endpoint(self, _solr_counts):
+        response = self.client.get("/api/v2/quickload")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["counts"]["issuer"], 1)
+        self.assertEqual(data["credential_counts"], SOLR_COUNTS)
+        self.assertFalse(data["stats_stale"])
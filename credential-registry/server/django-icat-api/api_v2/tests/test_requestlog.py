@@ -0,0 +1,70 @@
+import json
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api_v2.search.requestlog import (
+    current_log,
+    record_cache,
+    record_solr_query,
+    search_request_log,
+    timed_hydration,
+)
+
+
+def search_request(**params):
+    return Request(RequestFactory().get("/api/v2/search/topic", params))
+
+
+class SearchRequestLogTestCase(SimpleTestCase):
+    def logged_records(self, logger) -> list:
+        return [json.loads(call[0][1]) for call in logger.info.call_args_list]
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=1)
+    @mock.patch("api_v2.search.requestlog.LOGGER")
+    def test_sampled_record(self, logger):
+        with search_request_log("topic_search", search_request(name="acme", page="2")) as log:
+            record_solr_query(4, 0.01)
+            record_cache("miss")
+            with timed_hydration():
+                pass
+            log.set_response(Response({"total": 12, "results": []}))
+        record, = self.logged_records(logger)
+        self.assertEqual(record["view"], "topic_search")
+        self.assertEqual(record["params"], {"name": "acme", "page": "2"})
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["results"], 12)
+        self.assertEqual(record["cache"], "miss")
+        self.assertEqual(record["solr_qtime"], [4])
+        self.assertGreaterEqual(record["solr_ms"], 10)
+        self.assertGreaterEqual(record["total_ms"], record["hydration_ms"])
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=0, SEARCH_LOG_SLOW_MS=60000)
+    @mock.patch("api_v2.search.requestlog.LOGGER")
+    def test_not_sampled(self, logger):
+        with search_request_log("topic_search", search_request(name="acme")):
+            pass
+        logger.info.assert_not_called()
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=0, SEARCH_LOG_SLOW_MS=0)
+    @mock.patch("api_v2.search.requestlog.LOGGER")
+    def test_slow_always_logged(self, logger):
+        with search_request_log("credential_search", search_request(name="acme")) as log:
+            log.set_response(Response([1, 2, 3]))
+        record, = self.logged_records(logger)
+        self.assertEqual(record["results"], 3)
+
+    @override_settings(SEARCH_LOG_SAMPLE_RATE=0, SEARCH_LOG_SLOW_MS=60000)
+    def test_nested_logs(self):
+        record_solr_query(1, 0.01)
+        self.assertIsNone(current_log())
+        with search_request_log("outer", search_request()) as outer:
+            with search_request_log("inner", search_request()) as inner:
+                record_solr_query(2)
+            record_solr_query(3)
+            self.assertIs(current_log(), outer)
+        self.assertIsNone(current_log())
+        self.assertEqual(inner.solr_qtime, [2])
+        self.assertEqual(outer.solr_qtime, [3])
@@ -0,0 +1,78 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_v2.models.Credential import Credential
+from api_v2.models.CredentialSet import CredentialSet
+from api_v2.serializers.search import (
+    CredentialSearchPayloadSerializer,
+    CredentialSearchSerializer,
+    CredentialStoredSearchSerializer,
+    STORED_DOCUMENT_RELATIONS,
+)
+
+from .utils import create_credential, create_credential_type
+
+
+class StoredResult:
+    """
+    Stands in for a search result holding a stored document
+    """
+
+    def __init__(self, credential, payload=True):
+        self.pk = str(credential.id)
+        self.object = credential
+        self.payload = json.dumps(
+            CredentialSearchPayloadSerializer(credential).data, cls=JSONEncoder
+        ) if payload else None
+
+    def __getattr__(self, name):
+        return getattr(self.object, name)
+
+
+class StoredDocumentTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        credential_type = create_credential_type()
+        parent = create_credential(credential_type, "BC0000")
+        for index in range(1, 6):
+            create_credential(credential_type, "BC000{}".format(index),
+                              related_topics=[parent.topic])
+
+    def stored_results(self):
+        return [StoredResult(credential) for credential in Credential.objects.all()[1:]]
+
+    def test_relations_not_stored(self):
+        payload = json.loads(self.stored_results()[0].payload)
+        for field in STORED_DOCUMENT_RELATIONS:
+            self.assertNotIn(field, payload)
+
+    def test_relations_loaded_when_served(self):
+        results = self.stored_results()
+        CredentialSet.objects.update(last_effective_date="2026-01-01T00:00:00Z")
+        data = CredentialStoredSearchSerializer(results, many=True).data
+        expected = json.loads(json.dumps(
+            CredentialSearchSerializer(results, many=True).data, cls=JSONEncoder))
+        self.assertEqual(json.loads(json.dumps(data, cls=JSONEncoder)), expected)
+        self.assertTrue(all(
+            row["credential_set"]["last_effective_date"].startswith("2026-01-01")
+            for row in data
+        ))
+
+    def test_fixed_queries(self):
+        results = self.stored_results()
+        with CaptureQueriesContext(connection) as single:
+            CredentialStoredSearchSerializer(results[:1], many=True).data
+        with self.assertNumQueries(len(single.captured_queries)):
+            CredentialStoredSearchSerializer(results, many=True).data
+
+    def test_results_without_document(self):
+        result = StoredResult(Credential.objects.last(), payload=False)
+        with self.assertNumQueries(0):
+            data = CredentialStoredSearchSerializer([], many=True).data
+        self.assertEqual(data, [])
+        data = CredentialStoredSearchSerializer([result], many=True).data
+        self.assertEqual(data[0]["id"], result.object.id)
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api_v2.models.Credential import Credential
+from api_v2.models.Name import Name
+from api_v2.search.suggest import (
+    MAX_GRAM_SIZE,
+    build_suggest_query,
+    pick_name,
+    suggest_from_database,
+)
+
+from .utils import create_credential, create_credential_type
+
+
+class SuggestQueryTestCase(SimpleTestCase):
+    def test_word_prefixes(self):
+        self.assertEqual(
+            build_suggest_query("acme  co ltd", str),
+            'name_suggest:(acme AND co AND ltd) OR name_prefix:"acme co ltd"^10')
+
+    def test_long_words_truncated(self):
+        word = "incorporated" * 3
+        query = build_suggest_query("acme " + word, str)
+        self.assertIn("AND {})".format(word[:MAX_GRAM_SIZE]), query)
+        self.assertIn('name_prefix:"acme {}"'.format(word), query)
+
+    def test_no_words(self):
+        self.assertIsNone(build_suggest_query("a", str))
+        self.assertIsNone(build_suggest_query("", str))
+
+    def test_pick_name(self):
+        names = ["Widgets Acme Ltd", "Acme Widgets Ltd", "Other Name"]
+        self.assertEqual(pick_name(names, "acme wid"), "Acme Widgets Ltd")
+        self.assertEqual(pick_name(names, "wid lt"), "Widgets Acme Ltd")
+        self.assertEqual(pick_name(names, "missing"), "Widgets Acme Ltd")
+        self.assertIsNone(pick_name([], "acme"))
+
+
+@mock.patch("api_v2.search.suggest.connections", {"default": mock.Mock()})
+class DatabaseSuggestTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        credential_type = create_credential_type()
+        for source_id in ("BC0001", "BC0002", "BC0003"):
+            create_credential(credential_type, source_id)
+        credential = create_credential(credential_type, "BC0001")
+        Name.objects.create(credential=credential, text="Second name of BC0001")
+        revoked = create_credential(credential_type, "BC0004")
+        Credential.objects.filter(id=revoked.id).update(revoked=True)
+
+    def test_one_result_per_topic(self):
+        result = suggest_from_database("name of", 10)
+        self.assertEqual(
+            [row["name"] for row in result["results"]],
+            ["Name of BC0001", "Name of BC0002", "Name of BC0003"])
+        self.assertEqual(result["total"], 3)
+        self.assertFalse(result["partial"])
+
+    def test_limit(self):
+        result = suggest_from_database("name", 2)
+        self.assertEqual(len(result["results"]), 2)
+
+    def test_all_words_match(self):
+        result = suggest_from_database("second bc0001", 10)
+        self.assertEqual([row["name"] for row in result["results"]], ["Second name of BC0001"])
+        self.assertEqual(suggest_from_database("x", 10)["results"], [])
+
+    @override_settings(SEARCH_CACHE_TTL=0)
+    def test_endpoint_fallback(self):
+        response = self.client.get("/api/v2/search/suggest", {"q": "name bc0002", "limit": 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [
+            {"topic_id": Credential.objects.filter(topic__source_id="BC0002").first().topic_id,
+             "name": "Name of BC0002"},
+        ])
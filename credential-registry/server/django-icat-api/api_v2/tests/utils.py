@@ -0,0 +1,65 @@
+from api_v2.models.Address import Address
+from api_v2.models.Attribute import Attribute
+from api_v2.models.Credential import Credential
+from api_v2.models.CredentialSet import CredentialSet
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.models.Name import Name
+from api_v2.models.Schema import Schema
+from api_v2.models.Topic import Topic
+from api_v2.models.TopicRelationship import TopicRelationship
+
+
+def create_credential_type(index: int = 1, **kwargs) -> CredentialType:
+    issuer = Issuer.objects.create(
+        did="did:sov:issuer{}".format(index),
+        name="Issuer {}".format(index),
+        abbreviation="I{}".format(index),
+        email="issuer{}@example.com".format(index),
+        url="https://issuer{}.example.com".format(index),
+    )
+    schema = Schema.objects.create(
+        name="schema-{}".format(index),
+        version="1.0",
+        origin_did=issuer.did,
+    )
+    return CredentialType.objects.create(
+        schema=schema,
+        issuer=issuer,
+        description="Credential type {}".format(index),
+        **kwargs
+    )
+
+
+def create_credential(credential_type: CredentialType, source_id: str,
+                      related_topics=(), **kwargs) -> Credential:
+    """
+    Create a latest credential with a name, an address, a category and a
+    text attribute, in a credential set of its own
+    """
+    topic, _created = Topic.objects.get_or_create(source_id=source_id, type="registration")
+    credential = Credential.objects.create(
+        topic=topic,
+        credential_type=credential_type,
+        wallet_id="wallet-{}-{}".format(source_id, Credential.objects.count()),
+        latest=True,
+        **kwargs
+    )
+    credential_set = CredentialSet.objects.create(
+        credential_type=credential_type,
+        topic=topic,
+        latest_credential=credential,
+        first_effective_date=credential.effective_date,
+    )
+    credential.credential_set = credential_set
+    credential.save()
+    Name.objects.create(credential=credential, text="Name of {}".format(source_id))
+    Address.objects.create(credential=credential, city="Victoria", country="CA")
+    Attribute.objects.create(
+        credential=credential, type="entity_status", format="category", value="ACT")
+    Attribute.objects.create(
+        credential=credential, type="registration_id", format="text", value=source_id)
+    for related_topic in related_topics:
+        TopicRelationship.objects.create(
+            credential=credential, topic=topic, related_topic=related_topic)
+    return credential
@@ -59,10 +59,14 @@ miscPatterns = [
     path("quickload", misc.quickload),
 ]
 
+searchPatterns = [
+    path("search/suggest", search.NameSuggestView.as_view()),
+]
+
 swaggerPatterns = [
     path("", schema_view.with_ui("swagger", cache_timeout=None), name="api-docs")
 ]
 
 urlpatterns = format_suffix_patterns(
-    router.urls + miscPatterns + swaggerPatterns
+    router.urls + miscPatterns + searchPatterns + swaggerPatterns
 )
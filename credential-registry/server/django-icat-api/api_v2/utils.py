@@ -3,18 +3,32 @@
 A collection of utility classes for TOB
 """
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 import logging
 import os
+import threading
+import time
 
 from django.conf import settings
+from django.core.cache import caches
 from django.db import connection
+from django.utils import timezone
 
+from haystack import connections as haystack_connections
+from haystack.backends.solr_backend import SolrSearchBackend
 from haystack.query import SearchQuerySet
 from pysolr import SolrError
 
 LOGGER = logging.getLogger(__name__)
 
+# Cache backends which are not shared between API processes
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+_LOCAL_CACHE_WARNED = set()
+
 
 def fetch_custom_settings(*args):
     _values = {}
@@ -37,6 +51,64 @@ def apply_custom_methods(cls, *args):
         setattr(cls, function.__name__, classmethod(function))
 
 
+def shared_cache(alias: str):
+    """
+    Return the cache configured for an alias, or None when the alias is
+    missing or refers to a cache local to the current process
+    """
+    config = settings.CACHES.get(alias)
+    if not config or config.get("BACKEND") in LOCAL_CACHE_BACKENDS:
+        if alias not in _LOCAL_CACHE_WARNED:
+            _LOCAL_CACHE_WARNED.add(alias)
+            LOGGER.warning("No shared cache configured for '%s'", alias)
+        return None
+    return caches[alias]
+
+
+class VersionedCache:
+    """
+    Values cached in the current process, dropped after LOCAL_CACHE_TTL
+    seconds or as soon as another process calls clear(), which bumps a
+    version stored in the shared cache
+    """
+
+    def __init__(self, version_key: str):
+        self.version_key = version_key
+        self._lock = threading.Lock()
+        self._values = {}
+        self._version = None
+        self._loaded = 0.0
+
+    def _shared_version(self):
+        cache = shared_cache("shared")
+        return cache.get(self.version_key) if cache is not None else None
+
+    def values(self) -> dict:
+        """
+        Return the dict of cached values, emptied when it has expired
+        """
+        ttl = getattr(settings, "LOCAL_CACHE_TTL", 300)
+        version = self._shared_version()
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version or now - self._loaded >= ttl:
+                self._values = {}
+                self._version = version
+                self._loaded = now
+            return self._values
+
+    def clear(self):
+        cache = shared_cache("shared")
+        if cache is not None:
+            try:
+                cache.incr(self.version_key)
+            except ValueError:
+                # key not present
+                cache.add(self.version_key, 1, None)
+        with self._lock:
+            self._values = {}
+
+
 def model_counts(model_cls, cursor=None, optimize=None):
     if optimize is None:
         optimize = getattr(settings, "OPTIMIZE_TABLE_ROW_COUNTS", True)
@@ -57,20 +129,48 @@ def model_counts(model_cls, cursor=None, optimize=None):
     return row[0]
 
 
-def solr_counts():
-    latest_q = SearchQuerySet().filter(latest=True)
-    registrations_q = latest_q.filter(category="entity_status::ACT")
-    last_week = datetime.now() - timedelta(days=7)
-    last_month = datetime.now() - timedelta(days=30)
-    last_week_q = SearchQuerySet().filter(create_timestamp__gte=last_week)
-    last_month_q = SearchQuerySet().filter(create_timestamp__gte=last_month)
+# Credential counts, each computed by a facet query on the credential index
+SOLR_COUNT_QUERIES = (
+    ("active", "latest:true"),
+    ("registrations", 'latest:true AND category:"entity_status::ACT"'),
+    ("last_month", "create_timestamp:[NOW-30DAYS TO *]"),
+    ("last_week", "create_timestamp:[NOW-7DAYS TO *]"),
+)
+
+
+def solr_counts(using="default"):
+    """
+    Fetch the credential counts shown on the home page with a single Solr request
+    """
+    backend = haystack_connections[using].get_backend()
+    if not isinstance(backend, SolrSearchBackend):
+        return search_counts(using)
     try:
-        return {
-            "active": latest_q.count(),
-            "registrations": registrations_q.count(),
-            "last_month": last_month_q.count(),
-            "last_week": last_week_q.count(),
-        }
+        results = backend.conn.search(
+            "*:*",
+            rows=0,
+            facet="true",
+            **{"facet.query": [query for _name, query in SOLR_COUNT_QUERIES]}
+        )
     except SolrError:
         LOGGER.exception("Error when retrieving quickload counts from Solr")
         return False
+    counts = results.facets.get("facet_queries", {})
+    return {name: counts.get(query, 0) for name, query in SOLR_COUNT_QUERIES}
+
+
+def search_counts(using="default"):
+    """
+    Fetch the credential counts shown on the home page with one count query
+    each, for search engines other than Solr
+    """
+    now = timezone.now()
+    latest_q = SearchQuerySet(using=using).filter(latest=True)
+    return {
+        "active": latest_q.count(),
+        "registrations": latest_q.filter(category="entity_status::ACT").count(),
+        "last_month": SearchQuerySet(using=using).filter(
+            create_timestamp__gte=now - timedelta(days=30)).count(),
+        "last_week": SearchQuerySet(using=using).filter(
+            create_timestamp__gte=now - timedelta(days=7)).count(),
+    }
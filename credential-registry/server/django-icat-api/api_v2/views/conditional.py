@@ -0,0 +1,137 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from rest_framework.exceptions import APIException
+
+
+class NotModified(APIException):
+    """
+    Raised before the handler runs when the client copy is still current
+    """
+    status_code = 304
+
+    def __init__(self, response):
+        super(NotModified, self).__init__()
+        self.response = response
+
+
+def cache_control_policy(name: str, action: str) -> str:
+    """
+    Look up the Cache-Control header for a viewset action from the
+    API_CACHE_CONTROL setting, keyed by "<name>.<action>", "<name>" or "default"
+    """
+    policies = getattr(settings, "API_CACHE_CONTROL", None) or {}
+    for key in ("{}.{}".format(name, action), name, "default"):
+        if key in policies:
+            return policies[key]
+    return "no-cache"
+
+
+class ConditionalGetMixin(object):
+    """
+    Adds ETag and Last-Modified validators to GET responses, derived from
+    the latest update_timestamp and the number of the records involved.
+    Conditional requests matching the validators receive a 304 response
+    without running the handler.
+
+    `validator_models` lists the (model, path) pairs contributing to the
+    responses, where `path` leads from the model to the viewset object ID.
+    They apply to the requested object, or to all listed objects for list
+    requests.
+    Actions listed in `skip_validator_actions` provide their own validators.
+    List actions are only validated when listed in `validate_list_actions`,
+    as their validators aggregate over every listed row.
+    """
+    skip_validator_actions = ()
+    validate_list_actions = ()
+    validator_models = ()
+    _validators = None
+
+    def get_lookup_filter(self):
+        """
+        Return the filter selecting the requested object, or None for
+        list requests
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in self.kwargs:
+            return None
+        return {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+
+    def get_validator_state(self) -> list:
+        """
+        Return the latest update timestamp and row count of each validator
+        model, or None when the request is not validated
+        """
+        lookup = self.get_lookup_filter()
+        if lookup is None and self.action not in self.validate_list_actions:
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        if lookup is not None:
+            try:
+                queryset = queryset.filter(**lookup)
+            except (TypeError, ValueError):
+                # leave the handler to report the invalid ID
+                return None
+        ids = queryset.values("id")
+        models = ((queryset.model, "id"),) + tuple(self.validator_models)
+        querysets = [
+            model_cls.objects.filter(**{path + "__in": ids})
+            for model_cls, path in models
+        ]
+        return [
+            rows.order_by().aggregate(last=Max("update_timestamp"), count=Count("id"))
+            for rows in querysets
+        ]
+
+    def initial(self, request, *args, **kwargs):
+        super(ConditionalGetMixin, self).initial(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD") or \
+                self.action in self.skip_validator_actions:
+            return
+        state = self.get_validator_state()
+        if state is None:
+            return
+        if self.get_lookup_filter() is not None and not state[0]["count"]:
+            # leave the handler to report the missing object
+            return
+        timestamps = [row["last"] for row in state if row["last"]]
+        last_modified = max(timestamps) if timestamps else None
+        digest = hashlib.sha1(repr((
+            request.get_full_path(),
+            request.accepted_media_type,
+            [(row["last"] and row["last"].isoformat(), row["count"]) for row in state],
+        )).encode("utf-8")).hexdigest()
+        etag = 'W/"{}"'.format(digest)
+        self._validators = (etag, last_modified)
+        response = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super(ConditionalGetMixin, self).handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ConditionalGetMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+        if self._validators and response.status_code in (200, 304):
+            etag, last_modified = self._validators
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+            if not response.has_header("Cache-Control"):
+                response["Cache-Control"] = cache_control_policy(
+                    getattr(self, "basename", None) or self.queryset.model._meta.model_name,
+                    self.action,
+                )
+            patch_vary_headers(response, ("Accept",))
+        return response
@@ -1,6 +1,5 @@
 import logging
 
-from django.db import connection
 from django.conf import settings
 from django.http import JsonResponse
 
@@ -17,12 +16,7 @@ from rest_framework.parsers import FormParser
 from rest_framework import permissions
 
 from api_v2.feedback import email_feedback
-from api_v2.models.Claim import Claim
-from api_v2.models.Credential import Credential as CredentialModel
-from api_v2.models.CredentialType import CredentialType
-from api_v2.models.Issuer import Issuer
-from api_v2.models.Topic import Topic
-from api_v2.utils import model_counts, solr_counts
+from api_v2.quickload import get_stats
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,21 +25,14 @@ LOGGER = logging.getLogger(__name__)
 @authentication_classes(())
 @permission_classes((permissions.AllowAny,))
 def quickload(request, *args, **kwargs):
-    count_models = {
-        "claim": Claim,
-        "credential": CredentialModel,
-        "credentialtype": CredentialType,
-        "issuer": Issuer,
-        "topic": Topic,
-    }
-    with connection.cursor() as cursor:
-        counts = {mname: model_counts(model, cursor) for (mname, model) in count_models.items()}
-    cred_counts = solr_counts()
+    stats = get_stats()
     return JsonResponse(
         {
-            "counts": counts,
-            "credential_counts": cred_counts,
+            "counts": stats["counts"],
+            "credential_counts": stats["credential_counts"],
             "demo": settings.DEMO_SITE,
+            "stats_age": stats["age"],
+            "stats_stale": stats["stale"],
         }
     )
 
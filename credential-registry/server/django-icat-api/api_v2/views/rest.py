@@ -1,7 +1,9 @@
-import base64
+from datetime import datetime
 
-from django.db.models import Q
-from django.http import HttpResponse, Http404
+from django.db.models import DateTimeField, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 from rest_framework.exceptions import NotFound
@@ -23,12 +25,19 @@ from api_v2.serializers.rest import (
     CredentialTopicExtSerializer,
 )
 
-from rest_framework.serializers import SerializerMethodField
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer, SerializerMethodField
 
 from drf_yasg.utils import swagger_auto_schema
 
 from django_filters import rest_framework as filters
 
+from api_v2.serializers.prefetch import (
+    defer_heavy_fields,
+    hydrate_credential_set_topics,
+    hydrate_credential_topics,
+    prefetch_for_serializer,
+)
 from api_v2.serializers.search import CustomTopicSerializer
 
 from api_v2.models.Issuer import Issuer
@@ -36,36 +45,91 @@ from api_v2.models.Schema import Schema
 from api_v2.models.CredentialType import CredentialType
 from api_v2.models.Topic import Topic
 from api_v2.models.Credential import Credential
+from api_v2.models.CredentialSet import CredentialSet
 from api_v2.models.Address import Address
 from api_v2.models.Attribute import Attribute
 from api_v2.models.Name import Name
 
 from api_v2 import utils
-
-
-class IssuerViewSet(ReadOnlyModelViewSet):
+from api_v2.logos import logo_response
+from api_v2.views.conditional import ConditionalGetMixin
+from tob_api.pagination import ListCursorPagination
+
+
+def _query_list(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def select_fields(serializer, fields=None, expand=None):
+    """
+    Restrict a serializer to the requested fields. When `expand` is given,
+    nested relations not listed in it are returned as primary keys.
+    """
+    for name in list(serializer.fields):
+        field = serializer.fields[name]
+        if fields is not None and name not in fields:
+            serializer.fields.pop(name)
+        elif expand is not None and name not in expand:
+            many = isinstance(field, ListSerializer)
+            nested = field.child if many else field
+            if isinstance(nested, BaseSerializer):
+                kwargs = {} if field.source == name else {"source": field.source}
+                serializer.fields[name] = PrimaryKeyRelatedField(
+                    many=many, read_only=True, **kwargs)
+
+
+class CredentialListMixin:
+    """
+    Serialize credential listings with related data loaded in bulk, cursor
+    pagination (`cursor`, `page_size`) and field selection (`fields`,
+    `expand`)
+    """
+
+    def paginate_list(self, queryset, ordering="id") -> (ListCursorPagination, list):
+        paginator = ListCursorPagination()
+        paginator.ordering = ordering
+        return paginator, paginator.paginate_queryset(queryset, self.request, view=self)
+
+    def credential_list_response(self, queryset, serializer_class):
+        request = self.request
+        serializer = serializer_class(many=True, context=self.get_serializer_context())
+        select_fields(
+            serializer.child, _query_list(request, "fields"), _query_list(request, "expand"))
+        queryset = prefetch_for_serializer(queryset, serializer.child)
+        paginator, page = self.paginate_list(queryset)
+        serializer.instance = hydrate_credential_topics(page)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class IssuerViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     serializer_class = IssuerSerializer
     queryset = Issuer.objects.all()
+    skip_validator_actions = ("fetch_logo",)
+    # small tables, cheap to validate in full
+    validate_list_actions = ("list",)
+    validator_models = (
+        (CredentialType, "issuer_id"),
+    )
 
     @swagger_auto_schema(method='get')
     @action(detail=True, url_path="credentialtype", methods=["get"])
     def list_credential_types(self, request, pk=None):
         item = self.get_object()
-        queryset = item.credential_types
+        queryset = prefetch_for_serializer(
+            item.credential_types.all(), CredentialTypeSerializer)
         serializer = CredentialTypeSerializer(queryset, many=True)
         return Response(serializer.data)
 
     @swagger_auto_schema(method='get')
     @action(detail=True, url_path="logo", methods=["get"])
     def fetch_logo(self, request, pk=None):
-        issuer = get_object_or_404(self.queryset, pk=pk)
-        logo = None
-        if issuer.logo_b64:
-            logo = base64.b64decode(issuer.logo_b64)
-        if not logo:
-            raise Http404()
-        # FIXME - need to store the logo mime type
-        return HttpResponse(logo, content_type="image/jpg")
+        return logo_response(request, "issuer", pk)
+
+    def get_queryset(self):
+        return defer_heavy_fields(super(IssuerViewSet, self).get_queryset())
 
 
 class SchemaViewSet(ReadOnlyModelViewSet):
@@ -75,26 +139,27 @@ class SchemaViewSet(ReadOnlyModelViewSet):
     filterset_fields = ('id', 'name', 'version', 'origin_did',)
 
 
-class CredentialTypeViewSet(ReadOnlyModelViewSet):
+class CredentialTypeViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     serializer_class = CredentialTypeSerializer
     queryset = CredentialType.objects.all()
+    skip_validator_actions = ("fetch_logo",)
+    validate_list_actions = ("list",)
+    validator_models = (
+        (Issuer, "credential_types__id"),
+        (Schema, "credential_types__id"),
+    )
 
     @action(detail=True, url_path="logo", methods=["get"])
     def fetch_logo(self, request, pk=None):
-        cred_type = get_object_or_404(self.queryset, pk=pk)
-        logo = None
-        if cred_type.logo_b64:
-            logo = base64.b64decode(cred_type.logo_b64)
-        elif cred_type.issuer and cred_type.issuer.logo_b64:
-            logo = base64.b64decode(cred_type.issuer.logo_b64)
-        if not logo:
-            raise Http404()
-        # FIXME - need to store the logo mime type
-        return HttpResponse(logo, content_type="image/jpg")
+        return logo_response(request, "credentialtype", pk)
 
     @action(detail=True, url_path="language", methods=["get"])
     def fetch_language(self, request, pk=None):
-        cred_type = get_object_or_404(self.queryset, pk=pk)
+        cred_type = get_object_or_404(
+            CredentialType.objects.only(
+                "id", "category_labels", "claim_descriptions", "claim_labels"),
+            pk=pk,
+        )
         lang = {
             "category_labels": cred_type.category_labels,
             "claim_descriptions": cred_type.claim_descriptions,
@@ -102,10 +167,23 @@ class CredentialTypeViewSet(ReadOnlyModelViewSet):
         }
         return Response(lang)
 
+    def get_queryset(self):
+        return prefetch_for_serializer(
+            super(CredentialTypeViewSet, self).get_queryset(), self.serializer_class)
 
-class TopicViewSet(ReadOnlyModelViewSet):
+
+class TopicViewSet(ConditionalGetMixin, CredentialListMixin, ReadOnlyModelViewSet):
     serializer_class = TopicSerializer
     queryset = Topic.objects.all()
+    validator_models = (
+        (Credential, "topic_id"),
+        (CredentialSet, "topic_id"),
+        (Address, "credential__topic_id"),
+        (Attribute, "credential__topic_id"),
+        (Name, "credential__topic_id"),
+        (CredentialType, "credentials__topic_id"),
+        (Issuer, "credential_types__credentials__topic_id"),
+    )
 
     @action(detail=True, url_path="formatted", methods=["get"])
     def retrieve_formatted(self, request, pk=None):
@@ -116,23 +194,20 @@ class TopicViewSet(ReadOnlyModelViewSet):
     @action(detail=True, url_path="credential", methods=["get"])
     def list_credentials(self, request, pk=None):
         item = self.get_object()
-        queryset = item.credentials
-        serializer = ExpandedCredentialSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = item.credentials.all()
+        return self.credential_list_response(queryset, ExpandedCredentialSerializer)
 
     @action(detail=True, url_path="credential/active", methods=["get"])
     def list_active_credentials(self, request, pk=None):
         item = self.get_object()
         queryset = item.credentials.filter(revoked=False, inactive=False)
-        serializer = ExpandedCredentialSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.credential_list_response(queryset, ExpandedCredentialSerializer)
 
     @action(detail=True, url_path="credential/historical", methods=["get"])
     def list_historical_credentials(self, request, pk=None):
         item = self.get_object()
         queryset = item.credentials.filter(Q(revoked=True) | Q(inactive=True))
-        serializer = ExpandedCredentialSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.credential_list_response(queryset, ExpandedCredentialSerializer)
 
     @action(
         detail=False, methods=["get"], url_path="ident/(?P<type>[^/.]+)/(?P<source_id>[^/.]+)"
@@ -150,48 +225,72 @@ class TopicViewSet(ReadOnlyModelViewSet):
     @action(detail=True, url_path="credentialset", methods=["get"])
     def list_credential_sets(self, request, pk=None):
         item = self.get_object()
-        queryset = item.credential_sets.order_by("first_effective_date").all()
-        serializer = ExpandedCredentialSetSerializer(queryset, many=True)
-        return Response(serializer.data)
+        # cursors cannot resume from a null position
+        queryset = item.credential_sets.annotate(effective_order=Coalesce(
+            "first_effective_date",
+            Value(datetime(1970, 1, 1, tzinfo=timezone.utc), output_field=DateTimeField()),
+        ))
+        queryset = prefetch_for_serializer(queryset, ExpandedCredentialSetSerializer)
+        paginator, page = self.paginate_list(queryset, ("effective_order", "id"))
+        credential_sets = hydrate_credential_set_topics(page)
+        serializer = ExpandedCredentialSetSerializer(credential_sets, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def get_lookup_filter(self):
+        if self.kwargs.get("pk"):
+            return {"pk": self.kwargs["pk"]}
+        type = self.kwargs.get("type")
+        source_id = self.kwargs.get("source_id")
+        if not type or not source_id:
+            return None
+        return {"type": type, "source_id": source_id}
 
     def get_object(self):
         if self.kwargs.get("pk"):
             return super(TopicViewSet, self).get_object()
 
-        type = self.kwargs.get("type")
-        source_id = self.kwargs.get("source_id")
-        if not type or not source_id:
+        lookup = self.get_lookup_filter()
+        if not lookup:
             raise Http404()
 
         queryset = self.filter_queryset(self.get_queryset())
-        obj = get_object_or_404(queryset, type=type, source_id=source_id)
+        obj = get_object_or_404(queryset, **lookup)
 
         # May raise a permission denied
         self.check_object_permissions(self.request, obj)
         return obj
 
 
-class CredentialViewSet(ReadOnlyModelViewSet):
+class CredentialViewSet(ConditionalGetMixin, CredentialListMixin, ReadOnlyModelViewSet):
     serializer_class = CredentialSerializer
     queryset = Credential.objects.all()
+    validator_models = (
+        (Address, "credential_id"),
+        (Attribute, "credential_id"),
+        (Name, "credential_id"),
+        (Topic, "credentials__id"),
+        (CredentialSet, "credentials__id"),
+        (CredentialType, "credentials__id"),
+        (Issuer, "credential_types__credentials__id"),
+    )
 
     @action(detail=True, url_path="formatted", methods=["get"])
     def retrieve_formatted(self, request, pk=None):
+        self.queryset = prefetch_for_serializer(self.queryset, ExpandedCredentialSerializer)
         item = self.get_object()
+        hydrate_credential_topics([item])
         serializer = ExpandedCredentialSerializer(item)
         return Response(serializer.data)
 
     @action(detail=False, url_path="active", methods=["get"])
     def list_active(self, request, pk=None):
         queryset = self.queryset.filter(revoked=False, inactive=False, latest=True)
-        serializer = CredentialSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.credential_list_response(queryset, CredentialSerializer)
 
     @action(detail=False, url_path="historical", methods=["get"])
     def list_historical(self, request, pk=None):
         queryset = self.queryset.filter(Q(revoked=True) | Q(inactive=True))
-        serializer = CredentialSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.credential_list_response(queryset, CredentialSerializer)
 
     @action(detail=True, url_path="latest", methods=["get"])
     def get_latest(self, request, pk=None):
@@ -204,15 +303,21 @@ class CredentialViewSet(ReadOnlyModelViewSet):
         serializer = CredentialSerializer(latest)
         return Response(serializer.data)
 
-    def get_object(self):
+    def get_lookup_filter(self):
         pk = self.kwargs.get("pk")
         if not pk:
-            raise Http404()
+            return None
         filter = {"wallet_id": pk}
         try:
             filter = {"pk": int(pk)}
         except (ValueError, TypeError):
             pass
+        return filter
+
+    def get_object(self):
+        filter = self.get_lookup_filter()
+        if not filter:
+            raise Http404()
 
         queryset = self.filter_queryset(self.get_queryset())
         obj = get_object_or_404(queryset, **filter)
@@ -15,6 +15,9 @@ from drf_yasg.utils import swagger_auto_schema
 from haystack.query import RelatedSearchQuerySet
 
 from api_v2.models.Credential import Credential
+from api_v2.search.cache import cached_response
+from api_v2.search.requestlog import search_request_log, timed_hydration
+from api_v2.search.suggest import suggest_names
 from api_v2.search.filters import (
     AutocompleteFilter,
     CategoryFilter,
@@ -23,19 +26,45 @@ from api_v2.search.filters import (
     ExactFilter,
     StatusFilter,
 )
+from api_v2.search_indexes import stored_documents_enabled
+from api_v2.serializers.prefetch import defer_heavy_fields, hydrate_credential_topics
 from api_v2.serializers.search import (
     CredentialAutocompleteSerializer,
     CredentialSearchSerializer,
     CredentialFacetSerializer,
+    CredentialStoredAutocompleteSerializer,
+    CredentialStoredSearchSerializer,
     CredentialTopicSearchSerializer,
 )
-from tob_api.pagination import ResultLimitPagination
+from tob_api.pagination import ResultLimitPagination, SearchCursorPagination
 from django.conf import settings
 
 LOGGER = logging.getLogger(__name__)
 
 
-class NameAutocompleteView(HaystackViewSet):
+class StoredDocumentMixin:
+    """
+    Serve list results from the documents stored in the search index when
+    SEARCH_STORED_DOCUMENTS is enabled, skipping the database entirely
+    """
+    stored_serializer_class = None
+
+    def use_stored_documents(self) -> bool:
+        return self.stored_serializer_class is not None \
+            and self.action == "list" \
+            and stored_documents_enabled()
+
+    @property
+    def load_all(self):
+        return not self.use_stored_documents()
+
+    def get_serializer_class(self):
+        if self.use_stored_documents():
+            return self.stored_serializer_class
+        return super(StoredDocumentMixin, self).get_serializer_class()
+
+
+class NameAutocompleteView(StoredDocumentMixin, HaystackViewSet):
     """
     Return autocomplete results for a query string
     """
@@ -85,15 +114,17 @@ class NameAutocompleteView(HaystackViewSet):
     ]
     @swagger_auto_schema(manual_parameters=_swagger_params)
     def list(self, *args, **kwargs):
-        print(' >>> calling autocomplete')
-        ret = super(NameAutocompleteView, self).list(*args, **kwargs)
-        print(' >>> autocomplete returns', ret)
+        with search_request_log("autocomplete", self.request) as log:
+            ret = cached_response(
+                self.request,
+                lambda: super(NameAutocompleteView, self).list(*args, **kwargs))
+            log.set_response(ret)
         return ret
     retrieve = None
 
     index_models = [Credential]
-    load_all = True
     serializer_class = CredentialAutocompleteSerializer
+    stored_serializer_class = CredentialStoredAutocompleteSerializer
     # enable normal filtering
     filter_backends = [
         AutocompleteFilter,
@@ -105,12 +136,53 @@ class NameAutocompleteView(HaystackViewSet):
     ordering = ('-score')
 
 
-class CredentialSearchView(HaystackViewSet, FacetMixin):
+class NameSuggestView(APIView):
+    """
+    Return topic name suggestions for a partial name, using only the
+    search index
+    """
+    permission_classes = (permissions.AllowAny,)
+    result_limit = 10
+    max_result_limit = 25
+
+    _swagger_params = [
+        openapi.Parameter(
+            "q",
+            openapi.IN_QUERY,
+            description="Partial name",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description="Maximum number of suggestions",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ]
+    @swagger_auto_schema(manual_parameters=_swagger_params)
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", self.result_limit))
+        except ValueError:
+            limit = self.result_limit
+        limit = max(1, min(limit, self.max_result_limit))
+        with search_request_log("name_suggest", request) as log:
+            ret = cached_response(
+                request,
+                lambda: Response(suggest_names(request.query_params.get("q"), limit)))
+            log.set_response(ret)
+        return ret
+
+
+class CredentialSearchView(StoredDocumentMixin, HaystackViewSet, FacetMixin):
     """
     Provide credential search via Solr with both faceted (/facets) and unfaceted results
     """
 
     permission_classes = (permissions.AllowAny,)
+    pagination_class = SearchCursorPagination
+    # name used in search request logs
+    log_name = "credential_search"
 
     _swagger_params = [
         openapi.Parameter(
@@ -167,24 +239,32 @@ class CredentialSearchView(HaystackViewSet, FacetMixin):
             description="Filter by Topic ID",
             type=openapi.TYPE_STRING,
         ),
+        openapi.Parameter(
+            "cursor",
+            openapi.IN_QUERY,
+            description="Use cursor-based paging: '*' for the first page, then the returned next_cursor",
+            type=openapi.TYPE_STRING,
+        ),
     ]
     @swagger_auto_schema(manual_parameters=_swagger_params)
     def list(self, *args, **kwargs):
-        print(" >>> calling credentialsearch")
         if self.object_class is TopicSearchQuerySet:
             query = self.request.GET.get('name')
             topic_id = self.request.GET.get('topic_id')
             if not self.valid_search_query(query, topic_id):
                 raise Http404()
-        ret = super(CredentialSearchView, self).list(*args, **kwargs)
-        print(" >>> credentialsearch returns", ret)
+        with search_request_log(self.log_name, self.request) as log:
+            ret = cached_response(
+                self.request,
+                lambda: super(CredentialSearchView, self).list(*args, **kwargs))
+            log.set_response(ret)
         return ret
 
     @swagger_auto_schema(manual_parameters=_swagger_params)
     def retrieve(self, *args, **kwargs):
-        print(" >>> calling credentialsearch retrieve")
-        ret = super(CredentialSearchView, self).retrieve(*args, **kwargs)
-        print(" >>> credentialsearch retrieve returns", ret)
+        with search_request_log(self.log_name + ".retrieve", self.request) as log:
+            ret = super(CredentialSearchView, self).retrieve(*args, **kwargs)
+            log.set_response(ret)
         return ret
 
     def valid_search_query(self, query, topic_id):
@@ -196,8 +276,8 @@ class CredentialSearchView(HaystackViewSet, FacetMixin):
         return is_valid
 
     index_models = [Credential]
-    load_all = True
     serializer_class = CredentialSearchSerializer
+    stored_serializer_class = CredentialStoredSearchSerializer
     # enable normal filtering
     filter_backends = [
         CredNameFilter,
@@ -223,6 +303,12 @@ class CredentialSearchView(HaystackViewSet, FacetMixin):
         """
         We want facet_counts from the less-restricted queryset
         """
+        with search_request_log(self.log_name + ".facets", request) as log:
+            ret = cached_response(request, lambda: self.facet_response(request))
+            log.set_response(ret)
+        return ret
+
+    def facet_response(self, request):
         queryset = self.get_queryset()
         facet_queryset = self.filter_facet_queryset(queryset)
         result_queryset = self.filter_queryset(queryset)
@@ -256,20 +342,25 @@ class TopicSearchQuerySet(RelatedSearchQuerySet):
     def __len__(self):
         ret = super(TopicSearchQuerySet, self).__len__()
         if ret > LIMIT:
-            print(" >>> Limiting the query LEN", ret, LIMIT)
             ret = LIMIT
         return ret
 
     def topic_queryset(self):
-        return Credential.objects.select_related(
+        select = (
+            "credential_set",
             "credential_type",
             "credential_type__issuer",
             "credential_type__schema",
             "topic",
-        ).all()
+        )
+        prefetch = (
+            "names",
+            "related_topics",
+        )
+        queryset = Credential.objects.select_related(*select).prefetch_related(*prefetch)
+        return defer_heavy_fields(queryset, *select)
 
     def _fill_cache(self, start, end, **kwargs):
-        print(" >>> Limiting the cache results", start, end, LIMIT)
         if start is not None:
             if start > LIMIT:
                 start = LIMIT
@@ -281,7 +372,6 @@ class TopicSearchQuerySet(RelatedSearchQuerySet):
     def count(self):
         ret = super(TopicSearchQuerySet, self).count()
         if ret > LIMIT:
-            print(" >>> Limiting the query count", ret, LIMIT)
             ret = LIMIT
         return ret
 
@@ -290,4 +380,16 @@ class CredentialTopicSearchView(CredentialSearchView):
 
     object_class = TopicSearchQuerySet
     serializer_class = CredentialTopicSearchSerializer
+    log_name = "topic_search"
+    # topic results include data not held in the stored documents
+    stored_serializer_class = None
     facet_objects_serializer_class = CredentialTopicSearchSerializer
+
+    def paginate_queryset(self, queryset):
+        page = super(CredentialTopicSearchView, self).paginate_queryset(queryset)
+        if page is not None:
+            # load the active data of all topics on the page in bulk
+            with timed_hydration():
+                hydrate_credential_topics(
+                    [result.object for result in page if result.object is not None])
+        return page
@@ -1,5 +1,5 @@
 import base64
-from datetime import datetime
+from datetime import datetime, timedelta
 import json as _json
 import hashlib
 import logging
@@ -7,14 +7,17 @@ import re
 import time
 from importlib import import_module
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction, DEFAULT_DB_ALIAS
+from django.db.models import Q, signals
 from django.db.utils import IntegrityError
 from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
 
 from von_anchor.util import schema_key
 
+from api_v2.models.ActiveTopicFact import ActiveTopicFact, active_facts_enabled
 from api_v2.models.Issuer import Issuer
 from api_v2.models.Schema import Schema
 from api_v2.models.Topic import Topic
@@ -28,6 +31,8 @@ from api_v2.models.Attribute import Attribute
 from api_v2.models.Name import Name
 from api_v2.models.TopicRelationship import TopicRelationship
 
+from api_indy.tob_anchor.instrument import time_start, time_end, timed
+
 LOGGER = logging.getLogger(__name__)
 
 PROCESSOR_FUNCTION_BASE_PATH = "api_v2.processor"
@@ -391,11 +396,76 @@ class CredentialManager(object):
         processor_config = credential_type.processor_config
 
         with transaction.atomic():
+            if not credential.credential_set or active_facts_enabled():
+                self.lock_topic(credential.topic_id)
             if not credential.credential_set:
                 cardinality = self.credential_cardinality(credential, processor_config)
                 self.update_credential_set(credential_type, credential, cardinality)
             self.remove_search_models(credential)
             self.create_search_models(credential, processor_config)
+            if active_facts_enabled():
+                ActiveTopicFact.update_credentials(
+                    [credential.id], [credential.credential_set_id])
+
+    def reprocess_batch(self, credentials: list):
+        """
+        Reprocesses a batch of existing credentials in a single transaction,
+        replacing their search models with bulk queries. Search index updates
+        are left to the caller.
+        """
+        search_models = {}
+        with transaction.atomic():
+            # lock every topic up front, in ID order, so that concurrent
+            # batches cannot deadlock
+            Topic.lock_topics(credential.topic_id for credential in credentials)
+            for credential in credentials:
+                credential_type = self.get_credential_type(credential)
+                processor_config = credential_type.processor_config
+                if not credential.credential_set_id:
+                    cardinality = self.credential_cardinality(credential, processor_config)
+                    self.update_credential_set(credential_type, credential, cardinality)
+                for model in self.create_search_models(
+                        credential, processor_config, save=False):
+                    search_models.setdefault(model.__class__, []).append(model)
+            for model_key, model_cls in SUPPORTED_MODELS_MAPPING.items():
+                if model_key == "category":
+                    continue
+                model_cls.objects.filter(credential__in=credentials)._raw_delete(
+                    using=DEFAULT_DB_ALIAS)
+            for model_cls, models in search_models.items():
+                model_cls.objects.bulk_create(models)
+            if active_facts_enabled():
+                ActiveTopicFact.update_credentials(
+                    [credential.id for credential in credentials],
+                    [credential.credential_set_id for credential in credentials],
+                )
+
+    @classmethod
+    def lock_topic(cls, topic_id: int):
+        """
+        Block competing credentials for the same topic until the current
+        transaction ends
+        """
+        Topic.lock_topics([topic_id])
+
+    @classmethod
+    def update_last_issue_date(cls, credential_type: CredentialType):
+        """
+        Record the latest issue date for a credential type. Runs outside of
+        the credential transaction and skips the update when the stored value
+        is more recent than CREDENTIAL_TYPE_ISSUE_DATE_INTERVAL seconds.
+        """
+        now = timezone.now()
+        interval = timedelta(
+            seconds=getattr(settings, "CREDENTIAL_TYPE_ISSUE_DATE_INTERVAL", 60))
+        last_issue = credential_type.last_issue_date
+        if last_issue and now - last_issue < interval:
+            return
+        credential_type.last_issue_date = now
+        credential_type.update_timestamp = now
+        CredentialType.objects.filter(pk=credential_type.pk).filter(
+            Q(last_issue_date__isnull=True) | Q(last_issue_date__lt=now - interval)
+        ).update(last_issue_date=now, update_timestamp=now)
 
     @classmethod
     def find_or_create_topic(cls, topic_spec: dict, retry=True):
@@ -645,6 +715,25 @@ class CredentialManager(object):
             else:
                 rows.delete()
 
+    @classmethod
+    def revoke_credentials(cls, queryset, revoked_by: CredentialModel):
+        """
+        Revoke a set of credentials with a single UPDATE, then reindex them
+        """
+        cred_ids = list(queryset.values_list("id", flat=True))
+        if not cred_ids:
+            return
+        CredentialModel.objects.filter(pk__in=cred_ids).update(
+            latest=False,
+            revoked=True,
+            revoked_by=revoked_by,
+            revoked_date=revoked_by.effective_date,
+            update_timestamp=timezone.now(),
+        )
+        # Queryset updates don't trigger post_save
+        for cred in CredentialModel.objects.filter(pk__in=cred_ids):
+            signals.post_save.send(sender=CredentialModel, instance=cred, using=DEFAULT_DB_ALIAS)
+
     @classmethod
     def update_credential_set(cls, credential_type: CredentialType,
                               credential: CredentialModel,
@@ -657,22 +746,40 @@ class CredentialManager(object):
             "topic": credential.topic,
         }
         try:
-            cred_set = CredentialSet.objects.get(**existing_set_query)
+            cred_set = CredentialSet.objects.select_related("latest_credential")\
+                .get(**existing_set_query)
             latest_cred = credential
-
-            for prev_cred in cred_set.credentials.filter(revoked=False).order_by('effective_date'):
-                if prev_cred.effective_date <= credential.effective_date:
-                    prev_cred.latest = False
-                    prev_cred.revoked = True
-                    prev_cred.revoked_by = credential
-                    prev_cred.revoked_date = credential.effective_date
-                    prev_cred.save()
-                else:
-                    latest_cred = prev_cred
+            prev_cred = cred_set.latest_credential
+
+            if prev_cred and not prev_cred.revoked and \
+                    prev_cred.effective_date <= credential.effective_date:
+                # Credentials normally arrive in order, so only the previous
+                # latest credential of the set needs to be revoked
+                prev_cred.latest = False
+                prev_cred.revoked = True
+                prev_cred.revoked_by = credential
+                prev_cred.revoked_date = credential.effective_date
+                prev_cred.save(update_fields=(
+                    "latest", "revoked", "revoked_by", "revoked_date", "update_timestamp"))
+            else:
+                # Out-of-order arrival, or the latest credential was revoked
+                # by the issuer: revise any unrevoked set members by query
+                later_creds = cred_set.credentials.filter(
+                    revoked=False, effective_date__gt=credential.effective_date
+                ).order_by('effective_date')
+                next_cred = later_creds.first()
+                if next_cred:
+                    latest_cred = later_creds.last()
                     if not credential.revoked:
                         credential.revoked = True
-                        credential.revoked_by = prev_cred
-                        credential.revoked_date = prev_cred.effective_date
+                        credential.revoked_by = next_cred
+                        credential.revoked_date = next_cred.effective_date
+                cls.revoke_credentials(
+                    cred_set.credentials.filter(
+                        revoked=False, effective_date__lte=credential.effective_date
+                    ),
+                    credential,
+                )
 
             cred_set.latest_credential = latest_cred
             cred_set.first_effective_date = credential.effective_date if \
@@ -711,10 +818,11 @@ class CredentialManager(object):
     def populate_application_database(cls, credential_type: CredentialType,
                                       credential: Credential) -> CredentialModel:
         LOGGER.warn(">>> store cred in local database")
-        start_time = time.perf_counter()
+        perf = time_start("credential.store")
         processor_config = credential_type.processor_config
 
-        topic, related_topic = cls.resolve_credential_topics(credential, processor_config)
+        with timed("credential.resolve_topics"):
+            topic, related_topic = cls.resolve_credential_topics(credential, processor_config)
 
         # If we couldn't resolve _any_ topics from the configuration,
         # we can't continue
@@ -725,10 +833,6 @@ class CredentialManager(object):
             )
 
         with transaction.atomic():
-            # Acquire a lock on the topic to block competing credentials
-            # This lock is released when the transaction ends
-            Topic.objects.select_for_update().get(pk=topic.id)
-
             cardinality = cls.credential_cardinality(
                 credential, processor_config
             )
@@ -768,18 +872,30 @@ class CredentialManager(object):
                         )
                     )
 
-            # Assign to credential set
-            cls.update_credential_set(credential_type, db_credential, cardinality)
-
             # Save search models
-            cls.create_search_models(db_credential, processor_config)
+            with timed("credential.search_models"):
+                cls.create_search_models(db_credential, processor_config)
+
+            # Acquire a lock on the topic to block competing credentials
+            # only for the credential set revision. The lock is released
+            # when the transaction ends
+            with timed("credential.update_set"):
+                cls.lock_topic(topic.id)
+
+                # Assign to credential set
+                cred_set = cls.update_credential_set(
+                    credential_type, db_credential, cardinality)
+
+            # Revise the active facts of the credential set while the topic is locked
+            if active_facts_enabled():
+                with timed("credential.topic_facts"):
+                    ActiveTopicFact.update_credentials([db_credential.id], [cred_set.id])
 
-            # Update last issue date for credential type
-            credential_type.last_issue_date = datetime.now(timezone.utc)
-            credential_type.save()
+        # Update last issue date for credential type
+        cls.update_last_issue_date(credential_type)
 
         LOGGER.warn(
-            "<<< store cred in local database: " + str(time.perf_counter() - start_time)
+            "<<< store cred in local database: " + str(time_end(perf))
         )
 
         return db_credential
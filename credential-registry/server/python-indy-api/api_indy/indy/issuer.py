@@ -1,5 +1,6 @@
 import logging
 
+from api_v2.logos import clear_logo_ids
 from api_v2.models.CredentialType import CredentialType
 from api_v2.models.Issuer import Issuer
 from api_v2.models.Schema import Schema
@@ -11,6 +12,7 @@ from api_v2.serializers.rest import (
     SchemaSerializer,
     CredentialTypeSerializer,
 )
+from api_v2.serializers.search import clear_facet_labels
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,6 +33,8 @@ class IssuerManager:
         schemas, credential_types = self.update_schemas_and_ctypes(
             issuer, spec.get("credential_types", [])
         )
+        clear_facet_labels()
+        clear_logo_ids()
 
         # TODO: use a serializer to return consistent data with REST API?
         #       Do this at the view layer instead of this manager?
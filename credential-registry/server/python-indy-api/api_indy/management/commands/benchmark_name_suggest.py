@@ -0,0 +1,121 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from haystack.query import SQ, SearchQuerySet
+
+from api_v2.models.Credential import Credential
+from api_v2.models.Name import Name
+from api_v2.search.filters import Proximate
+from api_v2.search.suggest import latency_budget, suggest_names
+
+# fractions of a name typed before each request, simulating search-as-you-type
+PREFIX_STEPS = (0.2, 0.4, 0.7, 1.0)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Measures the latency of name suggestions over a sample of the stored names"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--using", default="default",
+            help="The search connection to query",
+        )
+        parser.add_argument(
+            "--samples", type=int, default=200,
+            help="Number of names sampled from the database",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10,
+            help="Number of suggestions requested",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=None,
+            help="Random seed for repeatable samples",
+        )
+        parser.add_argument(
+            "--compare", action="store_true",
+            help="Also measure the proximity query used by the autocomplete view",
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 1:
+            raise CommandError("--samples must be positive")
+        rand = random.Random(options["seed"])
+        terms = self.sample_terms(options["samples"], rand)
+        if not terms:
+            raise CommandError("No names found")
+        self.stdout.write("Measuring {} requests from {} names, budget {}ms".format(
+            len(terms), options["samples"], latency_budget()))
+
+        timings = []
+        partial = 0
+        for term in terms:
+            start = time.perf_counter()
+            result = suggest_names(term, options["limit"], options["using"])
+            timings.append((time.perf_counter() - start) * 1000)
+            partial += result["partial"]
+        self.report("suggest", timings)
+        self.stdout.write("  partial results: {}".format(partial))
+
+        if options["compare"]:
+            timings = []
+            for term in terms:
+                start = time.perf_counter()
+                self.autocomplete(term, options["limit"], options["using"])
+                timings.append((time.perf_counter() - start) * 1000)
+            self.report("autocomplete", timings)
+
+    def sample_terms(self, samples: int, rand: random.Random) -> list:
+        """
+        Sample active names by random ID and derive the typed prefixes
+        """
+        bounds = Name.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return []
+        ids = [rand.randint(bounds["low"], bounds["high"]) for _ in range(samples * 2)]
+        names = list(
+            Name.objects.filter(
+                id__in=ids, credential__latest=True, credential__revoked=False
+            ).values_list("text", flat=True)[:samples]
+        )
+        terms = []
+        for name in names:
+            name = " ".join((name or "").split())
+            for step in PREFIX_STEPS:
+                term = name[:max(2, int(len(name) * step))].strip()
+                if len(term) >= 2 and term not in terms[-1:]:
+                    terms.append(term)
+        return terms
+
+    def autocomplete(self, term: str, limit: int, using: str) -> list:
+        match_any = not settings.SEARCH_TERMS_EXCLUSIVE
+        query = SearchQuerySet(using=using).models(Credential).filter(
+            latest=True, revoked=False
+        ).filter(
+            SQ(name_suggest=Proximate(term))
+            | SQ(name_precise=Proximate(term, boost=10, any=match_any))
+        ).load_all()
+        return list(query[:limit])
+
+    def report(self, label: str, timings: list):
+        budget = latency_budget()
+        over = sum(1 for value in timings if value > budget)
+        self.stdout.write(
+            "{}: p50 {:.1f}ms, p95 {:.1f}ms, p99 {:.1f}ms, max {:.1f}ms, "
+            "{} of {} over budget".format(
+                label,
+                percentile(timings, 0.5),
+                percentile(timings, 0.95),
+                percentile(timings, 0.99),
+                max(timings),
+                over, len(timings),
+            )
+        )
@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.models.Name import Name
+from api_v2.views.search import CredentialSearchView, CredentialTopicSearchView
+
+from api_indy.management.commands.benchmark_name_suggest import percentile
+
+SEARCH_VIEWS = {
+    "credential": CredentialSearchView,
+    "topic": CredentialTopicSearchView,
+}
+
+# Models declaring heavy columns in DEFERRED_FIELDS
+DEFERRING_MODELS = (Issuer, CredentialType)
+
+
+@contextmanager
+def heavy_fields_loaded():
+    """
+    Temporarily load the heavy columns which are normally deferred
+    """
+    saved = {model: model.DEFERRED_FIELDS for model in DEFERRING_MODELS}
+    try:
+        for model in saved:
+            model.DEFERRED_FIELDS = ()
+        yield
+    finally:
+        for model, fields in saved.items():
+            model.DEFERRED_FIELDS = fields
+
+
+def selected_bytes(queries: list) -> int:
+    """
+    Sum the size of the rows returned by the captured SELECT statements,
+    as stored by Postgres
+    """
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            cursor.execute(
+                "SELECT COALESCE(SUM(pg_column_size(rows.*)), 0) FROM ({}) rows".format(sql))
+            total += cursor.fetchone()[0]
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the bytes read from Postgres by search result pages with and "
+        "without the heavy columns deferred, along with their query count and latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--view", choices=sorted(SEARCH_VIEWS), default="topic",
+            help="The search view to request",
+        )
+        parser.add_argument(
+            "--samples", type=int, default=50,
+            help="Number of names sampled from the database as search terms",
+        )
+        parser.add_argument(
+            "--page-size", type=int, default=10,
+            help="Number of results requested per page",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=None,
+            help="Random seed for repeatable samples",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Row sizes can only be measured on Postgres")
+        if options["samples"] < 1:
+            raise CommandError("--samples must be positive")
+        terms = self.sample_terms(options["samples"], random.Random(options["seed"]))
+        if not terms:
+            raise CommandError("No names found")
+        view = SEARCH_VIEWS[options["view"]].as_view({"get": "list"})
+        factory = RequestFactory()
+
+        results = {"deferred": [], "full": []}
+        # measure the view itself, not the response cache
+        with override_settings(SEARCH_CACHE_TTL=0):
+            for term in terms:
+                request_args = {"name": term, "page_size": options["page_size"]}
+                deferred = self.measure(view, factory.get("/", request_args))
+                with heavy_fields_loaded():
+                    full = self.measure(view, factory.get("/", request_args))
+                if deferred is None or full is None:
+                    self.stderr.write("Search for '{}' failed".format(term))
+                    continue
+                results["deferred"].append(deferred)
+                results["full"].append(full)
+        if not results["deferred"]:
+            raise CommandError("No successful searches")
+
+        self.stdout.write("{} search pages of {} results from {} terms".format(
+            options["view"], options["page_size"], len(terms)))
+        self.stdout.write("{:<20}{:>14}{:>14}".format("", "deferred", "full"))
+        for label, key, fmt in (
+                ("postgres bytes p50", "db_bytes", "{:.0f}"),
+                ("postgres bytes p95", "db_bytes", "{:.0f}"),
+                ("postgres bytes max", "db_bytes", "{:.0f}"),
+                ("response bytes p50", "response_bytes", "{:.0f}"),
+                ("queries p50", "queries", "{:.0f}"),
+                ("latency p50 (ms)", "latency", "{:.1f}"),
+                ("latency p95 (ms)", "latency", "{:.1f}")):
+            columns = []
+            for mode in ("deferred", "full"):
+                values = [row[key] for row in results[mode]]
+                if label.endswith("max"):
+                    value = max(values)
+                else:
+                    value = percentile(values, 0.95 if "p95" in label else 0.5)
+                columns.append(fmt.format(value))
+            self.stdout.write("{:<20}{:>14}{:>14}".format(label, *columns))
+        deferred_total = sum(row["db_bytes"] for row in results["deferred"])
+        full_total = sum(row["db_bytes"] for row in results["full"])
+        if full_total:
+            self.stdout.write("deferral saves {:.1f}% of the bytes read from Postgres".format(
+                100 * (full_total - deferred_total) / full_total))
+
+    def measure(self, view, request) -> dict:
+        """
+        Render one search page, returning its measurements or None on failure
+        """
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            latency = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            return None
+        return {
+            "db_bytes": selected_bytes(context.captured_queries),
+            "response_bytes": len(response.content),
+            "queries": len(context.captured_queries),
+            "latency": latency,
+        }
+
+    def sample_terms(self, samples: int, rand: random.Random) -> list:
+        """
+        Sample active names by random ID, searching for their first two words
+        """
+        bounds = Name.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return []
+        ids = [rand.randint(bounds["low"], bounds["high"]) for _ in range(samples * 2)]
+        names = Name.objects.filter(
+            id__in=ids, credential__latest=True, credential__revoked=False
+        ).values_list("text", flat=True)[:samples]
+        return [" ".join(name.split()[:2]) for name in names if name and name.strip()]
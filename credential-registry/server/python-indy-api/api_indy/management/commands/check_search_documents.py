@@ -0,0 +1,89 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from haystack import connections
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_v2.models.Credential import Credential
+from api_v2.search_indexes import CredentialIndex, stored_documents_enabled
+from api_v2.serializers.search import CredentialSearchPayloadSerializer
+
+from api_indy.tob_anchor.solrqueue import SolrQueue
+
+
+class Command(BaseCommand):
+    help = "Compares the documents stored in the search index with the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--using", default="default",
+            help="The search connection to check",
+        )
+        parser.add_argument(
+            "--sample", type=int, default=0,
+            help="Number of randomly chosen credentials to check (0 for all)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=None,
+            help="Random seed for repeatable samples",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="Number of credentials fetched from the index per request",
+        )
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Reindex credentials with a missing or outdated stored document",
+        )
+
+    def handle(self, *args, **options):
+        if not stored_documents_enabled():
+            raise CommandError("SEARCH_STORED_DOCUMENTS is not enabled")
+        using = options["using"]
+        batch_size = options["batch_size"]
+        index = CredentialIndex()
+        backend = connections[using].get_backend()
+
+        ids = list(Credential.objects.order_by("id").values_list("id", flat=True))
+        if options["sample"] and options["sample"] < len(ids):
+            ids = sorted(random.Random(options["seed"]).sample(ids, options["sample"]))
+
+        checked = 0
+        mismatched = []
+        for pos in range(0, len(ids), batch_size):
+            batch = list(index.read_queryset(using).filter(id__in=ids[pos:pos + batch_size]))
+            if not batch:
+                continue
+            stored = self.fetch_payloads(backend, [cred.id for cred in batch])
+            for credential in batch:
+                checked += 1
+                expected = json.loads(json.dumps(
+                    CredentialSearchPayloadSerializer(credential).data, cls=JSONEncoder))
+                payload = stored.get(str(credential.id))
+                if not payload or json.loads(payload) != expected:
+                    mismatched.append(credential)
+                    self.stdout.write("Stored document {} for credential {}".format(
+                        "outdated" if payload else "missing", credential.id))
+
+        self.stdout.write("Checked {} credentials, {} inconsistent".format(
+            checked, len(mismatched)))
+        if mismatched and options["fix"]:
+            with SolrQueue() as queue:
+                queue.add(CredentialIndex, using, mismatched)
+            self.stdout.write("Reindexed {} credentials".format(len(mismatched)))
+
+    def fetch_payloads(self, backend, ids: list) -> dict:
+        """
+        Fetch the stored payloads for a set of credential IDs
+        """
+        results = backend.conn.search(
+            "*:*",
+            fq=[
+                "django_ct:api_v2.credential",
+                "django_id:({})".format(" OR ".join(str(cred_id) for cred_id in ids)),
+            ],
+            fl="django_id,payload",
+            rows=len(ids),
+        )
+        return {doc["django_id"]: doc.get("payload") for doc in results}
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api_v2.models.ActiveTopicFact import ActiveTopicFact
+from api_v2.models.Topic import Topic
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the active topic facts from the current credentials"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Number of topics refreshed per transaction",
+        )
+        parser.add_argument(
+            "--start-id", type=int, default=0,
+            help="The first topic ID to refresh",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        ids = list(
+            Topic.objects.filter(id__gte=options["start_id"])
+            .order_by("id").values_list("id", flat=True)
+        )
+        start_time = time.perf_counter()
+        for pos in range(0, len(ids), batch_size):
+            batch = ids[pos:pos + batch_size]
+            with transaction.atomic():
+                ActiveTopicFact.refresh_topics(batch)
+            self.stdout.write("Refreshed {} of {} topics (last ID {})".format(
+                pos + len(batch), len(ids), batch[-1]))
+        self.stdout.write("Refreshed {} topics in {:.1f}s".format(
+            len(ids), time.perf_counter() - start_time))
@@ -1,43 +1,205 @@
+import json
+import multiprocessing
+import os
+from queue import Empty
+import time
+
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction, DEFAULT_DB_ALIAS
-from django.db.models import signals
+from django.db import connections
+from django.db.models import Max, Min
 
 from api_indy.indy.credential import CredentialManager
 
-from api_v2.models.Address import Address
-from api_v2.models.Attribute import Attribute
 from api_v2.models.Credential import Credential
-from api_v2.models.Name import Name
+from api_v2.search_indexes import CredentialIndex
 
 from api_indy.tob_anchor.solrqueue import SolrQueue
 
 
+def reprocess_shard(shard: int, start_id: int, end_id: int, chunk_size: int, progress=None):
+    """
+    Reprocess the credentials with IDs in (start_id, end_id], one chunk per
+    transaction, reporting (shard, last_id, count) after each chunk
+    """
+    mgr = CredentialManager()
+    last_id = start_id
+    with SolrQueue() as queue:
+        while True:
+            credentials = list(
+                Credential.objects.filter(id__gt=last_id, id__lte=end_id)
+                .order_by("id")
+                .prefetch_related("claims")[:chunk_size]
+            )
+            if not credentials:
+                break
+
+            # Remove and recreate search records
+            mgr.reprocess_batch(credentials)
+
+            # Now reindex
+            queue.add(CredentialIndex, None, credentials)
+
+            last_id = credentials[-1].id
+            if progress:
+                progress.put((shard, last_id, len(credentials)))
+    connections.close_all()
+    return last_id
+
+
 class Command(BaseCommand):
     help = "Reprocesses all credentials to populate search database"
 
-    def handle(self, *args, **options):
-        queue = SolrQueue()
-        with queue:
-            self.reprocess(queue, *args, **options)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of worker processes, each handling a range of credential IDs",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Number of credentials processed per transaction",
+        )
+        parser.add_argument(
+            "--start-id", type=int, default=None,
+            help="Only reprocess credentials with an ID at or above this value",
+        )
+        parser.add_argument(
+            "--end-id", type=int, default=None,
+            help="Only reprocess credentials with an ID at or below this value",
+        )
+        parser.add_argument(
+            "--checkpoint", default=None,
+            help="File used to record progress, allowing an interrupted run to be resumed",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Ignore any progress recorded in the checkpoint file",
+        )
+        parser.add_argument(
+            "--progress-interval", type=float, default=10,
+            help="Seconds between progress reports",
+        )
 
-    def reprocess(self, queue, *args, **options):
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--workers and --chunk-size must be positive")
         self.stdout.write("Starting...")
 
-        cred_count = Credential.objects.count()
-        self.stdout.write("Reprocessing {} credentials".format(cred_count))
-
-        current_cred = 0
-        mgr = CredentialManager()
-        for credential in Credential.objects.all().iterator():
-            current_cred += 1
-            self.stdout.write(
-                "Processing credential id: {} ({} of {})".format(
-                    credential.id, current_cred, cred_count
-                )
-            )
+        shards = None
+        checkpoint = options["checkpoint"]
+        if checkpoint and not options["restart"] and os.path.exists(checkpoint):
+            with open(checkpoint) as cp_file:
+                shards = json.load(cp_file)["shards"]
+            self.stdout.write("Resuming from checkpoint {}".format(checkpoint))
+        if not shards:
+            shards = self.plan_shards(
+                options["workers"], options["start_id"], options["end_id"])
+        if not shards:
+            self.stdout.write("No credentials to reprocess")
+            return
 
-            # Remove and recreate search records
-            mgr.reprocess(credential)
+        self._shards = shards
+        self._checkpoint = checkpoint
+        self._interval = options["progress_interval"]
+        self._total = sum(
+            Credential.objects.filter(id__gt=last, id__lte=end).count()
+            for (_start, end, last) in shards)
+        self._count = 0
+        self._started = time.time()
+        self._reported = self._started
+        self.stdout.write("Reprocessing {} credentials".format(self._total))
+        self.save_checkpoint()
 
-            # Now reindex
-            signals.post_save.send(sender=Credential, instance=credential, using=DEFAULT_DB_ALIAS)
+        if len(shards) == 1:
+            (_start, end, last) = shards[0]
+            reprocess_shard(0, last, end, options["chunk_size"], _ProgressSink(self))
+        else:
+            self.run_workers(shards, options["chunk_size"])
+
+        self.report(force=True)
+        if checkpoint and self._count >= self._total:
+            os.remove(checkpoint)
+        self.stdout.write("Done")
+
+    def plan_shards(self, workers: int, start_id: int = None, end_id: int = None) -> list:
+        """
+        Split the credential ID range into contiguous ranges of roughly
+        equal size, one per worker
+        """
+        query = Credential.objects.all()
+        if start_id is not None:
+            query = query.filter(id__gte=start_id)
+        if end_id is not None:
+            query = query.filter(id__lte=end_id)
+        bounds = query.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            return []
+        low = bounds["min_id"] - 1
+        high = bounds["max_id"]
+        step = max((high - low + workers - 1) // workers, 1)
+        shards = []
+        for shard_start in range(low, high, step):
+            shard_end = min(shard_start + step, high)
+            # (start, end, last processed ID)
+            shards.append([shard_start, shard_end, shard_start])
+        return shards
+
+    def run_workers(self, shards: list, chunk_size: int):
+        # child processes must not share the parent's database connections
+        connections.close_all()
+        progress = multiprocessing.Queue()
+        procs = []
+        for idx, (_start, end, last) in enumerate(shards):
+            if last >= end:
+                continue
+            proc = multiprocessing.Process(
+                target=reprocess_shard, args=(idx, last, end, chunk_size, progress))
+            proc.start()
+            procs.append(proc)
+        while any(proc.is_alive() for proc in procs) or not progress.empty():
+            try:
+                update = progress.get(timeout=1)
+            except Empty:
+                self.report()
+                continue
+            self.advance(*update)
+        failed = [proc for proc in procs if proc.exitcode]
+        if failed:
+            self.report(force=True)
+            raise CommandError(
+                "{} worker(s) failed, rerun with the same checkpoint to resume".format(len(failed)))
+
+    def advance(self, shard: int, last_id: int, count: int):
+        self._shards[shard][2] = last_id
+        self._count += count
+        self.save_checkpoint()
+        self.report()
+
+    def save_checkpoint(self):
+        if not self._checkpoint:
+            return
+        temp_path = self._checkpoint + ".tmp"
+        with open(temp_path, "w") as cp_file:
+            json.dump({"shards": self._shards}, cp_file)
+        os.replace(temp_path, self._checkpoint)
+
+    def report(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._reported < self._interval:
+            return
+        self._reported = now
+        elapsed = now - self._started
+        rate = self._count / elapsed if elapsed else 0
+        self.stdout.write(
+            "Processed {} of {} credentials ({:.1f}/s)".format(self._count, self._total, rate))
+
+
+class _ProgressSink:
+    """
+    Receives progress updates when processing in a single process
+    """
+
+    def __init__(self, command: Command):
+        self._command = command
+
+    def put(self, update):
+        self._command.advance(*update)
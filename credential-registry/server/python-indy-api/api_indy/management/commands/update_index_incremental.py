@@ -0,0 +1,186 @@
+from datetime import timedelta
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections as db_connections
+from django.utils import timezone
+from haystack import connections
+
+from api_v2.models.Address import Address
+from api_v2.models.Attribute import Attribute
+from api_v2.models.Credential import Credential
+from api_v2.models.CredentialSet import CredentialSet
+from api_v2.models.CredentialType import CredentialType
+from api_v2.models.Issuer import Issuer
+from api_v2.models.Name import Name
+from api_v2.models.Schema import Schema
+from api_v2.models.SearchIndexWatermark import SearchIndexWatermark
+from api_v2.models.Topic import Topic
+from api_v2.search_indexes import CredentialIndex
+
+# Models whose changes are rendered into the credential search documents,
+# with the path leading from the credential
+RELATED_MODELS = (
+    (Address, "addresses"),
+    (Attribute, "attributes"),
+    (Name, "names"),
+    (Topic, "topic"),
+    (CredentialSet, "credential_set"),
+    (CredentialType, "credential_type"),
+    (Issuer, "credential_type__issuer"),
+    (Schema, "credential_type__schema"),
+)
+
+
+def index_credentials(using: str, ids: list) -> int:
+    """
+    Render and post the search documents for a batch of credentials
+    """
+    index = CredentialIndex()
+    backend = connections[using].get_backend()
+    rows = index.index_queryset(using).filter(id__in=ids)
+    backend.update(index, rows, commit=False)
+    return len(ids)
+
+
+def _index_credentials_worker(args) -> int:
+    try:
+        return index_credentials(*args)
+    finally:
+        db_connections.close_all()
+
+
+def remove_deleted(using: str, batch_size: int) -> int:
+    """
+    Remove the search documents of credentials which no longer exist,
+    paging through every indexed credential ID
+    """
+    backend = connections[using].get_backend()
+    cursor_mark = "*"
+    removed = 0
+    while True:
+        results = backend.conn.search(
+            "*:*",
+            fq=["django_ct:api_v2.credential"],
+            fl="id,django_id",
+            sort="id asc",
+            rows=batch_size,
+            cursorMark=cursor_mark,
+        )
+        indexed = {int(doc["django_id"]): doc["id"] for doc in results.docs}
+        existing = set(
+            Credential.objects.filter(id__in=indexed).values_list("id", flat=True))
+        deleted = [doc_id for pk, doc_id in indexed.items() if pk not in existing]
+        if deleted:
+            backend.conn.delete(id=deleted, commit=False)
+            removed += len(deleted)
+        if not results.docs or results.nextCursorMark == cursor_mark:
+            return removed
+        cursor_mark = results.nextCursorMark
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the credential search index with records changed since the last run, "
+        "including changes to their topics, credential sets, credential types, issuers "
+        "and schemas, and removes the documents of deleted credentials"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--using", default="default",
+            help="The search connection to update",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Number of credentials indexed per batch",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of worker processes used to index batches",
+        )
+        parser.add_argument(
+            "--overlap", type=int, default=60,
+            help="Seconds subtracted from the watermark to allow for transactions "
+                 "that were still in progress during the previous run",
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Ignore the stored watermark and reindex all credentials",
+        )
+        parser.add_argument(
+            "--skip-removals", action="store_true",
+            help="Do not remove the documents of deleted credentials, which "
+                 "requires paging through every indexed credential ID",
+        )
+
+    def handle(self, *args, **options):
+        using = options["using"]
+        batch_size = options["batch_size"]
+        if batch_size < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive")
+        index_name = "{}.{}".format(CredentialIndex.__module__, CredentialIndex.__name__)
+
+        # rows updated while indexing are picked up by the next run
+        started = timezone.now()
+        watermark = None
+        if not options["full"]:
+            watermark = SearchIndexWatermark.objects.filter(
+                index=index_name, using=using
+            ).values_list("watermark", flat=True).first()
+
+        if watermark:
+            since = watermark - timedelta(seconds=options["overlap"])
+            self.stdout.write("Indexing credentials updated since {}".format(since))
+            ids = self.changed_credentials(since)
+        else:
+            self.stdout.write("No watermark found, indexing all credentials")
+            ids = list(Credential.objects.order_by("id").values_list("id", flat=True))
+
+        self.stdout.write("Indexing {} credentials".format(len(ids)))
+        batches = [
+            (using, ids[pos:pos + batch_size])
+            for pos in range(0, len(ids), batch_size)
+        ]
+        count = 0
+        start_time = time.perf_counter()
+        if options["workers"] > 1 and len(batches) > 1:
+            # child processes must not share the parent's database connections
+            db_connections.close_all()
+            with multiprocessing.Pool(options["workers"]) as pool:
+                for result in pool.imap_unordered(_index_credentials_worker, batches):
+                    count += result
+                    self.stdout.write("Indexed {} of {} credentials".format(count, len(ids)))
+        else:
+            for batch in batches:
+                count += index_credentials(*batch)
+                self.stdout.write("Indexed {} of {} credentials".format(count, len(ids)))
+        removed = 0
+        if not options["skip_removals"]:
+            removed = remove_deleted(using, max(batch_size, 1000))
+            self.stdout.write("Removed {} deleted credentials".format(removed))
+        if ids or removed:
+            connections[using].get_backend().conn.commit()
+
+        SearchIndexWatermark.objects.update_or_create(
+            index=index_name, using=using, defaults={"watermark": started})
+        self.stdout.write("Indexed {} credentials in {:.1f}s".format(
+            count, time.perf_counter() - start_time))
+
+    def changed_credentials(self, since) -> list:
+        """
+        Find the credentials updated since a timestamp, including those whose
+        related records have changed
+        """
+        ids = set(
+            Credential.objects.filter(update_timestamp__gte=since)
+            .values_list("id", flat=True)
+        )
+        for model_cls, path in RELATED_MODELS:
+            changed = model_cls.objects.filter(update_timestamp__gte=since).values("id")
+            ids.update(
+                Credential.objects.filter(**{path + "__in": changed})
+                .values_list("id", flat=True)
+            )
+        return sorted(ids)
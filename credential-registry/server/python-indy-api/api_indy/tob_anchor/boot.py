@@ -27,7 +27,7 @@ import os
 import platform
 
 from django.conf import settings
-import django.db
+from django.db import connection
 from wsgi import application
 
 from vonx.common.eventloop import run_coro
@@ -37,6 +37,9 @@ from .config import (
     indy_general_wallet_config,
     indy_wallet_config,
 )
+from .connections import ConnectionPolicy
+from .executor import DjangoExecutor
+from .instrument import INSTRUMENT, STATS
 
 LOGGER = logging.getLogger(__name__)
 
@@ -81,6 +84,7 @@ async def init_app(on_startup=None, on_cleanup=None):
     from aiohttp.web import Application
     from aiohttp_wsgi import WSGIHandler
     from api_indy.tob_anchor.processor import CredentialProcessorQueue
+    from api_indy.tob_anchor.quickload import QuickloadRefresher
     from api_indy.tob_anchor.solrqueue import SolrQueue
     from api_indy.tob_anchor.urls import get_routes
 
@@ -91,15 +95,18 @@ async def init_app(on_startup=None, on_cleanup=None):
     # all other requests forwarded to django
     app.router.add_route("*", "/{path_info:.*}", wsgi_handler)
 
-    processor = CredentialProcessorQueue()
+    processor = CredentialProcessorQueue(DJANGO_EXECUTOR)
     processor.setup(app)
     solrqueue = SolrQueue()
     solrqueue.setup(app)
+    quickload = QuickloadRefresher()
+    quickload.setup(app)
 
     if on_startup:
         app.on_startup.append(on_startup)
     if on_cleanup:
         app.on_cleanup.append(on_cleanup)
+    app.on_cleanup.append(stop_django_executor)
     no_headers = os.environ.get("DISABLE_SERVER_HEADERS")
     if not no_headers or no_headers == "false":
         app.on_response_prepare.append(add_server_headers)
@@ -107,20 +114,43 @@ async def init_app(on_startup=None, on_cleanup=None):
     return app
 
 
+def _time_db_query(execute, sql, params, many, context):
+    timer = STATS.start("db")
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        STATS.end(timer)
+
+
 def run_django_proc(proc, *args):
+    DB_CONNECTIONS.before_task()
     try:
+        if INSTRUMENT:
+            with connection.execute_wrapper(_time_db_query):
+                return proc(*args)
         return proc(*args)
     finally:
-        django.db.connections.close_all()
+        DB_CONNECTIONS.after_task()
+
+def run_django(proc, *args, reject: bool = True) -> asyncio.Future:
+    """
+    Run a Django task in the dedicated executor. Raises ExecutorFull when
+    the executor queue is full, unless `reject` is false.
+    """
+    return DJANGO_EXECUTOR.run(run_django_proc, proc, *args, reject=reject)
+
 
-def run_django(proc, *args) -> asyncio.Future:
-    return asyncio.get_event_loop().run_in_executor(None, run_django_proc, proc, *args)
+async def stop_django_executor(_app=None):
+    DJANGO_EXECUTOR.stop()
 
 
 def run_reindex():
     from django.core.management import call_command
     batch_size = os.getenv("SOLR_BATCH_SIZE", 500)
-    call_command("update_index", "--max-retries=5", "--batch-size={}".format(batch_size))
+    if os.getenv("SOLR_REINDEX_MODE", "incremental").lower() == "full":
+        call_command("update_index", "--max-retries=5", "--batch-size={}".format(batch_size))
+    else:
+        call_command("update_index_incremental", "--batch-size={}".format(batch_size))
 
 
 def run_migration():
@@ -185,3 +215,15 @@ def shutdown():
 
 
 MANAGER = IndyManager(indy_env())
+
+DB_CONNECTIONS = ConnectionPolicy(
+    os.getenv("DJANGO_DB_CONNECTION_MODE", "persistent"),
+    int(os.getenv("DJANGO_DB_CONN_MAX_AGE", 600)),
+    int(os.getenv("DJANGO_DB_IDLE_TIMEOUT", 300)),
+    int(os.getenv("DJANGO_DB_CHECK_INTERVAL", 30)),
+)
+
+DJANGO_EXECUTOR = DjangoExecutor(
+    int(os.getenv("DJANGO_EXECUTOR_THREADS", 10)),
+    int(os.getenv("DJANGO_EXECUTOR_QUEUE", 100)),
+)
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+
+import django.db
+from django.db.backends.signals import connection_created
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionPolicy:
+    """
+    Manage the Django database connections held by executor threads.
+
+    In `persistent` mode each thread keeps its connections open between
+    tasks. A connection idle for more than `check_interval` seconds is
+    tested before reuse, and connections are recycled once idle for
+    `idle_timeout` seconds or older than `max_age` seconds.
+
+    In `pooled` mode connections are closed after every task, leaving
+    connection reuse to an external pooler such as pgbouncer.
+    """
+
+    MODES = ("persistent", "pooled")
+
+    def __init__(self, mode: str = "persistent", max_age: int = 600,
+                 idle_timeout: int = 300, check_interval: int = 30):
+        mode = (mode or "persistent").lower()
+        if mode not in self.MODES:
+            raise ValueError("Unknown database connection mode: {}".format(mode))
+        self._mode = mode
+        self._max_age = max_age
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stats = {
+            "opened": 0,
+            "closed": 0,
+            "recycled": 0,
+            "checks": 0,
+        }
+        connection_created.connect(self._connection_created, weak=False)
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _connection_created(self, sender, connection, **kwargs):
+        connection._policy_opened = time.monotonic()
+        self._count("opened")
+
+    def _close(self, conn, reason: str = None):
+        if reason:
+            LOGGER.debug("Recycling database connection (%s)", reason)
+            self._count("recycled")
+        try:
+            conn.close()
+        except django.db.Error:
+            LOGGER.exception("Error closing database connection")
+        self._count("closed")
+
+    def before_task(self):
+        """
+        Recycle stale or broken connections held by the current thread
+        """
+        if self._mode != "persistent":
+            return
+        now = time.monotonic()
+        for conn in django.db.connections.all():
+            if conn.connection is None:
+                continue
+            age = now - getattr(conn, "_policy_opened", now)
+            idle = now - getattr(conn, "_policy_last_used", now)
+            reason = None
+            if self._max_age and age > self._max_age:
+                reason = "max age"
+            elif self._idle_timeout and idle > self._idle_timeout:
+                reason = "idle"
+            elif idle > self._check_interval:
+                self._count("checks")
+                if not conn.is_usable():
+                    reason = "unusable"
+            if reason:
+                self._close(conn, reason)
+
+    def after_task(self):
+        """
+        Release or retain the current thread's connections after a task
+        """
+        now = time.monotonic()
+        for conn in django.db.connections.all():
+            if conn.connection is None:
+                continue
+            if self._mode != "persistent":
+                self._close(conn)
+            elif conn.in_atomic_block or \
+                    conn.get_autocommit() != conn.settings_dict["AUTOCOMMIT"]:
+                self._close(conn, "transaction state")
+            elif conn.errors_occurred and not conn.is_usable():
+                self._close(conn, "error")
+            else:
+                conn.errors_occurred = False
+                conn._policy_last_used = now
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = self._stats.copy()
+        result["mode"] = self._mode
+        return result
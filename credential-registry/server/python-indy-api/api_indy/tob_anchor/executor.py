@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ExecutorFull(Exception):
+    """
+    Raised when a task is rejected because the executor queue is full
+    """
+    pass
+
+
+class DjangoExecutor:
+    """
+    A fixed-size thread pool for Django work with a bounded queue.
+    Tasks submitted once `max_threads + max_queue` tasks are pending
+    are rejected with :class:`ExecutorFull` instead of being accepted.
+    """
+
+    def __init__(self, max_threads: int = 10, max_queue: int = 100):
+        self._max_threads = max_threads
+        self._max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    @property
+    def max_threads(self) -> int:
+        return self._max_threads
+
+    @property
+    def max_queue(self) -> int:
+        return self._max_queue
+
+    @property
+    def full(self) -> bool:
+        return self._pending >= self._max_threads + self._max_queue
+
+    def start(self):
+        with self._lock:
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_threads, thread_name_prefix="django")
+
+    def stop(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait)
+
+    def submit(self, proc, *args, reject: bool = True) -> Future:
+        """
+        Submit a task to the pool. When `reject` is false the task is
+        accepted even if the queue is full.
+        """
+        self.start()
+        with self._lock:
+            if reject and self.full:
+                self._rejected += 1
+                raise ExecutorFull("Django executor queue is full")
+            self._pending += 1
+        try:
+            return self._executor.submit(self._run, proc, args)
+        except:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, proc, *args, reject: bool = True) -> asyncio.Future:
+        """
+        Submit a task to the pool and return an awaitable result
+        """
+        return asyncio.wrap_future(self.submit(proc, *args, reject=reject))
+
+    def _run(self, proc, args):
+        with self._lock:
+            self._active += 1
+        try:
+            return proc(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads": self._max_threads,
+                "max_queue": self._max_queue,
+                "active": self._active,
+                "queued": max(self._pending - self._active, 0),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
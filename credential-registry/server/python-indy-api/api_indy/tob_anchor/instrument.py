@@ -0,0 +1,212 @@
+"""
+Thread-safe timing instrumentation for the anchor and credential processing.
+
+Durations are recorded in fixed-bucket histograms per task name, which can
+be reported as JSON (with estimated percentiles) or in the Prometheus text
+exposition format. With a non-zero window the statistics are rotated
+periodically, keeping the previous window available for comparison.
+"""
+
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in seconds. Not thread-safe on its own.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, value: float):
+        idx = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by interpolating within the matching bucket
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for idx, count in enumerate(self.counts):
+            upper = self.buckets[idx] if idx < len(self.buckets) else self.max
+            if count and seen + count >= rank:
+                upper = min(upper, self.max)
+                lower = max(lower, self.min)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.max
+
+
+class Instrumentation:
+    """
+    A registry of task duration histograms
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 0):
+        self._buckets = buckets
+        self._window = window
+        self._lock = threading.Lock()
+        self._current = {}
+        self._previous = None
+        self._started = time.time()
+        self._previous_started = None
+
+    def _rotate(self, now: float):
+        if self._window and now - self._started >= self._window:
+            self._previous = self._current
+            self._previous_started = self._started
+            self._current = {}
+            self._started = now
+
+    def observe(self, task: str, value: float):
+        with self._lock:
+            self._rotate(time.time())
+            hist = self._current.get(task)
+            if not hist:
+                hist = self._current[task] = Histogram(self._buckets)
+            hist.observe(value)
+
+    def start(self, *tasks):
+        return (tasks, time.perf_counter())
+
+    def end(self, timer) -> float:
+        (tasks, start) = timer
+        diff = time.perf_counter() - start
+        for task in tasks:
+            self.observe(task, diff)
+        return diff
+
+    @contextmanager
+    def timer(self, *tasks):
+        timer = self.start(*tasks)
+        try:
+            yield timer
+        finally:
+            self.end(timer)
+
+    def reset(self):
+        with self._lock:
+            self._current = {}
+            self._previous = None
+            self._started = time.time()
+            self._previous_started = None
+
+    @staticmethod
+    def _summarize(hists: dict, started: float) -> dict:
+        result = {
+            "since": started,
+            "min": {},
+            "max": {},
+            "total": {},
+            "count": {},
+            "avg": {},
+        }
+        for (label, _q) in QUANTILES:
+            result[label] = {}
+        for task, hist in hists.items():
+            result["min"][task] = hist.min
+            result["max"][task] = hist.max
+            result["total"][task] = hist.total
+            result["count"][task] = hist.count
+            result["avg"][task] = hist.total / hist.count
+            for (label, q) in QUANTILES:
+                result[label][task] = hist.quantile(q)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._rotate(time.time())
+            result = self._summarize(self._current, self._started)
+            if self._previous is not None:
+                result["previous"] = self._summarize(
+                    self._previous, self._previous_started)
+        result["window"] = self._window
+        return result
+
+    def prometheus(self, prefix: str = "tob_anchor", gauges: dict = None) -> str:
+        """
+        Render the current window in the Prometheus text exposition format
+        """
+        name = "{}_duration_seconds".format(prefix)
+        lines = [
+            "# HELP {} Duration of instrumented tasks".format(name),
+            "# TYPE {} histogram".format(name),
+        ]
+        with self._lock:
+            self._rotate(time.time())
+            for task in sorted(self._current):
+                hist = self._current[task]
+                cumulative = 0
+                for idx, bound in enumerate(hist.buckets):
+                    cumulative += hist.counts[idx]
+                    lines.append('{}_bucket{{task="{}",le="{}"}} {}'.format(
+                        name, task, bound, cumulative))
+                lines.append('{}_bucket{{task="{}",le="+Inf"}} {}'.format(
+                    name, task, hist.count))
+                lines.append('{}_sum{{task="{}"}} {}'.format(name, task, hist.total))
+                lines.append('{}_count{{task="{}"}} {}'.format(name, task, hist.count))
+        for group, values in (gauges or {}).items():
+            gauge = "{}_{}".format(prefix, group)
+            lines.append("# TYPE {} gauge".format(gauge))
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append('{}{{stat="{}"}} {}'.format(gauge, key, value))
+        return "\n".join(lines) + "\n"
+
+
+INSTRUMENT = os.getenv("INSTRUMENT", "true").lower() != "false"
+
+STATS = Instrumentation(window=int(os.getenv("STATS_WINDOW", 0)))
+
+
+def time_start(*tasks):
+    return STATS.start(*tasks)
+
+
+def time_end(timer) -> float:
+    return STATS.end(timer)
+
+
+@contextmanager
+def timed(*tasks):
+    """
+    Context manager recording the duration of a block when instrumentation is enabled
+    """
+    if INSTRUMENT:
+        with STATS.timer(*tasks) as timer:
+            yield timer
+    else:
+        yield None
@@ -1,4 +1,4 @@
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
 import logging
 
 from vonx.indy.messages import StoredCredential
@@ -11,14 +11,16 @@ from vonx.web.view_helpers import (
 from api_indy.indy.credential import Credential, CredentialException, CredentialManager
 
 from .boot import run_django_proc
+from .executor import DjangoExecutor
+from .instrument import timed
 
 LOGGER = logging.getLogger(__name__)
 
 
 class CredentialProcessorQueue(IndyCredentialProcessor):
-    def __init__(self, max_threads=10):
+    def __init__(self, executor: DjangoExecutor):
         super(CredentialProcessorQueue, self).__init__()
-        self._max_threads = max_threads
+        self._executor = executor
 
     def setup(self, app):
         app["credqueue"] = self
@@ -32,10 +34,11 @@ class CredentialProcessorQueue(IndyCredentialProcessor):
         self.stop()
 
     def start(self):
-        self._executor = ThreadPoolExecutor(max_workers=self._max_threads)
+        self._executor.start()
 
     def stop(self):
-        self._executor.shutdown(True)
+        # the shared executor is shut down by the application
+        pass
 
     def start_batch(self) -> object:
         """
@@ -53,17 +56,19 @@ class CredentialProcessorQueue(IndyCredentialProcessor):
         """
         Perform credential processing and create related objects.
         Processing can be deferred until end_batch to determine appropriate chunk size,
-        currently using naive :class:`ThreadPoolExecutor`
+        currently using the shared :class:`DjangoExecutor`. Requests are admitted
+        by the view, so processing is never rejected here.
         """
         cred = Credential(stored.cred.cred_data, stored.cred.cred_req_metadata, stored.cred_id)
         credential_manager = self.get_manager(batch_info)
         LOGGER.info("Processing credential %s for DID %s", stored.cred_id, origin_did)
         def proc():
             try:
-                return credential_manager.process(cred, origin_did)
+                with timed("credential.process"):
+                    return credential_manager.process(cred, origin_did)
             except CredentialException as e:
                 raise IndyCredentialProcessorException(str(e)) from e
-        return self._executor.submit(run_django_proc, proc)
+        return self._executor.submit(run_django_proc, proc, reject=False)
 
     def end_batch(self, batch_info):
         """
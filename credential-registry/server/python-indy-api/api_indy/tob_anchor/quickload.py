@@ -0,0 +1,56 @@
+import logging
+import threading
+
+from django.db import connections
+
+from api_v2.quickload import refresh_interval, refresh_stats
+
+LOGGER = logging.getLogger(__name__)
+
+
+class QuickloadRefresher:
+    """
+    Recompute the home page statistics on a worker thread every
+    `interval` seconds
+    """
+
+    def __init__(self, interval: int = None):
+        if interval is None:
+            interval = refresh_interval()
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def setup(self, app=None):
+        if app:
+            app["quickload"] = self
+            app.on_startup.append(self.app_start)
+            app.on_cleanup.append(self.app_stop)
+
+    async def app_start(self, _app=None):
+        self.start()
+
+    async def app_stop(self, _app=None):
+        self.stop()
+
+    def start(self):
+        if self._interval <= 0:
+            LOGGER.info("Quickload statistics refresher disabled")
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, join=True):
+        self._stop.set()
+        if join and self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                refresh_stats()
+            except Exception:
+                LOGGER.exception("Error when refreshing quickload statistics")
+            finally:
+                connections.close_all()
+            self._stop.wait(self._interval)
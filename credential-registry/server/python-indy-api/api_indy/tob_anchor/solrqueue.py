@@ -1,38 +1,140 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
+import os
 from queue import Empty, Full, Queue
 import threading
+import time
 
+from django.db import connections
+from django.utils.module_loading import import_string
+from haystack.exceptions import SkipDocument
 from haystack.utils import get_identifier
 
+from api_v2.models.SolrQueueEntry import SolrQueueEntry
+from api_v2.search.cache import bump_generation
 from api_v2.search.index import TxnAwareSearchIndex
 
+from .instrument import timed
+
 LOGGER = logging.getLogger(__name__)
 
 
 class SolrQueue:
-    def __init__(self):
-        self._queue = Queue()
+    """
+    Queue Solr index updates and deletes for processing by a worker thread.
+
+    In durable mode each pending update is also recorded in the solr_queue
+    table, in the same transaction as the indexed change when there is one.
+    The in-memory queue is then only a bounded buffer in front of the table:
+    rows are removed once Solr has accepted the update, and anything left
+    over (after a restart or when the buffer overflows) is replayed from
+    the table.
+
+    Updates are rendered in chunks of `chunk_size` documents on a pool of
+    `workers` threads and posted without a hard commit, relying on Solr's
+    `commitWithin` (or a soft commit when `commit_within` is zero) to make
+    them visible.
+
+    Updates received within `debounce` seconds of each other are merged, so
+    that a record saved repeatedly during one ingestion is only rendered and
+    posted once.
+
+    Cached search responses are invalidated once `commit_within` has passed
+    after Solr accepted the updates, when they have become visible.
+    """
+
+    RATE_WINDOW = 60
+
+    def __init__(self, durable: bool = None, maxsize: int = None,
+                 chunk_size: int = None, workers: int = None, commit_within: int = None,
+                 debounce: float = None):
+        if durable is None:
+            durable = os.getenv("SOLR_QUEUE_DURABLE", "false").lower() == "true"
+        if maxsize is None:
+            maxsize = int(os.getenv("SOLR_QUEUE_MAXSIZE", 1000 if durable else 0))
+        if chunk_size is None:
+            chunk_size = int(os.getenv("SOLR_QUEUE_CHUNK_SIZE", 200))
+        if workers is None:
+            workers = int(os.getenv("SOLR_QUEUE_WORKERS", 2))
+        if commit_within is None:
+            commit_within = int(os.getenv("SOLR_COMMIT_WITHIN", 5000))
+        if debounce is None:
+            debounce = float(os.getenv("SOLR_QUEUE_DEBOUNCE", 0.5))
+        self._durable = durable
+        self._chunk_size = max(chunk_size, 1)
+        self._workers = max(workers, 1)
+        self._commit_within = commit_within
+        self._debounce = debounce
+        self._queue = Queue(maxsize)
         self._prev_queue = None
+        self._pool = None
+        self._replay = threading.Event()
         self._stop = threading.Event()
         self._thread = None
         self._trigger = threading.Event()
+        self._lock = threading.Lock()
+        self._processing_since = None
+        self._deferred_since = None
+        self._rate = deque()
+        # due times of pending search cache invalidations
+        self._invalidations = deque()
+        self._stats = {
+            "indexed": 0,
+            "removed": 0,
+            "chunks": 0,
+            "errors": 0,
+            "dropped": 0,
+        }
 
-    def add(self, index_cls, using, instances):
-        ids = [instance.id for instance in instances]
-        LOGGER.debug("Solr queue add %s", ids)
+    @property
+    def durable(self) -> bool:
+        return self._durable
+
+    def persist(self, index_cls, using, ids, delete=False) -> list:
+        """
+        Record pending updates in the durable queue table, returning the row IDs
+        """
+        index_path = "{}.{}".format(index_cls.__module__, index_cls.__name__)
+        rows = SolrQueueEntry.objects.bulk_create([
+            SolrQueueEntry(
+                index=index_path,
+                using=using or "default",
+                object_id=str(object_id),
+                delete=bool(delete),
+            )
+            for object_id in ids
+        ])
+        return [row.id for row in rows]
+
+    def _put(self, index_cls, using, ids, delete, pending):
+        if self._durable and pending is None:
+            pending = self.persist(index_cls, using, ids, delete)
         try:
-            self._queue.put( (index_cls, using, ids, 0) )
+            with timed("solr.enqueue"):
+                self._queue.put_nowait(
+                    (index_cls, using, ids, delete, pending or [], time.time()) )
+            self._trigger.set()
         except Full:
-            LOGGER.warning("Solr queue full")
+            if self._durable:
+                LOGGER.warning("Solr queue full, deferring to durable queue")
+                with self._lock:
+                    if not self._deferred_since:
+                        self._deferred_since = time.time()
+                self._replay.set()
+            else:
+                LOGGER.warning("Solr queue full")
 
-    def delete(self, index_cls, using, instances):
+    def add(self, index_cls, using, instances, pending=None):
+        ids = [instance.id for instance in instances]
+        LOGGER.debug("Solr queue add %s", ids)
+        self._put(index_cls, using, ids, 0, pending)
+
+    def delete(self, index_cls, using, instances, pending=None):
         ids = [get_identifier(instance) for instance in instances]
         LOGGER.debug("Solr queue delete %s", ids)
-        try:
-            self._queue.put( (index_cls, using, ids, 1) )
-        except Full:
-            LOGGER.warning("Solr queue full")
+        self._put(index_cls, using, ids, 1, pending)
 
     def setup(self, app=None):
         if app:
@@ -59,6 +161,12 @@ class SolrQueue:
         TxnAwareSearchIndex._backend_queue = self._prev_queue
 
     def start(self):
+        if self._durable:
+            # process anything left over from a previous run
+            self._replay.set()
+        if self._workers > 1:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="solr")
         self._thread = threading.Thread(target=self._run)
         self._thread.start()
 
@@ -67,49 +175,244 @@ class SolrQueue:
         self._trigger.set()
         if join:
             self._thread.join()
+            if self._pool:
+                self._pool.shutdown()
+                self._pool = None
 
     def trigger(self):
         self._trigger.set()
 
     def _run(self):
         while True:
-            self._trigger.wait(5)
+            self._trigger.wait(self._next_wait())
+            if self._debounce and not self._stop.is_set():
+                # collect further updates for the same records before draining
+                self._stop.wait(self._debounce)
+            self._trigger.clear()
             self._drain()
+            if self._replay.is_set():
+                self._replay.clear()
+                try:
+                    self._replay_pending()
+                except Exception:
+                    LOGGER.exception("Error replaying durable Solr queue")
+                    self._replay.set()
             if self._stop.is_set():
+                if self._invalidations:
+                    # wait for the last updates to become visible
+                    time.sleep(max(self._invalidations[-1] - time.time(), 0))
+                self._run_invalidations()
                 return
+            self._run_invalidations()
+
+    def _collect(self, batch: dict, index_cls, using, ids, delete, pending) -> int:
+        """
+        Merge queued updates into a batch so that each record is removed and
+        rendered at most once, returning the number of redundant updates dropped.
+        A delete supersedes an earlier add, while an add following a delete
+        is kept and processed after it.
+        """
+        group = batch.setdefault((index_cls, using), ({}, []))
+        ops, batch_pending = group
+        batch_pending.extend(pending)
+        dropped = 0
+        for object_id in ids:
+            # deletes are queued by identifier (app.model.pk), adds by pk
+            key = str(object_id).rsplit(".", 1)[-1]
+            op = ops.get(key)
+            if op is None:
+                op = ops[key] = [None, None]
+            if delete:
+                if op[1] is not None:
+                    op[1] = None
+                    dropped += 1
+                elif op[0] is not None:
+                    dropped += 1
+                op[0] = object_id
+            else:
+                if op[1] is not None:
+                    dropped += 1
+                op[1] = object_id
+        return dropped
 
     def _drain(self):
-        last_index = None
-        last_using = None
-        last_del = 0
-        last_ids = set()
+        batch = {}
+        dropped = 0
+        since = None
         while True:
             try:
-                index_cls, using, ids, delete = self._queue.get_nowait()
+                index_cls, using, ids, delete, pending, queued = self._queue.get_nowait()
             except Empty:
-                index_cls = None
-            if last_index and last_index == index_cls and last_using == using and last_del == delete:
-                last_ids.update(ids)
-            else:
-                if last_index:
-                    if last_del:
-                        self.remove(last_index, last_using, last_ids)
-                    else:
-                        self.update(last_index, last_using, last_ids)
+                break
+            if since is None:
+                since = queued
+                with self._lock:
+                    self._processing_since = queued
+            dropped += self._collect(batch, index_cls, using, ids, delete, pending)
+        if dropped:
+            LOGGER.debug("Dropped %d redundant Solr update(s)", dropped)
+            with self._lock:
+                self._stats["dropped"] += dropped
+        processed = False
+        for (index_cls, using), (ops, pending) in batch.items():
+            if self._process(index_cls, using, ops, pending):
+                processed = True
+        with self._lock:
+            self._processing_since = None
+        if processed:
+            self._schedule_invalidate()
+
+    def _process(self, index_cls, using, ops: dict, pending=None) -> bool:
+        removed = [op[0] for op in ops.values() if op[0] is not None]
+        added = [op[1] for op in ops.values() if op[1] is not None]
+        try:
+            if removed:
+                self.remove(index_cls, using, removed)
+            if added:
+                self.update(index_cls, using, added)
+        except Exception:
+            LOGGER.exception("Error processing Solr queue")
+            with self._lock:
+                self._stats["errors"] += 1
+            if self._durable:
+                # retry from the durable queue
+                self._replay.set()
+            return False
+        if pending:
+            SolrQueueEntry.objects.filter(pk__in=pending).delete()
+        return True
+
+    def _replay_pending(self, batch_size: int = 500):
+        """
+        Process the updates recorded in the durable queue table
+        """
+        last_id = 0
+        processed = False
+        while not self._stop.is_set():
+            rows = list(SolrQueueEntry.objects.filter(pk__gt=last_id).order_by("id")[:batch_size])
+            if not rows:
+                with self._lock:
+                    self._deferred_since = None
+                break
+            LOGGER.info("Replaying %d pending Solr update(s)", len(rows))
+            batch = {}
+            index_classes = {}
+            dropped = 0
+            for row in rows:
+                last_id = row.id
+                if row.index not in index_classes:
+                    try:
+                        index_classes[row.index] = import_string(row.index)
+                    except ImportError:
+                        LOGGER.exception("Discarding Solr queue entries for unknown index %s", row.index)
+                        index_classes[row.index] = None
+                index_cls = index_classes[row.index]
                 if not index_cls:
+                    SolrQueueEntry.objects.filter(pk=row.id).delete()
+                    continue
+                object_id = row.object_id if row.delete else int(row.object_id)
+                dropped += self._collect(
+                    batch, index_cls, row.using, [object_id], row.delete, [row.id])
+            if dropped:
+                with self._lock:
+                    self._stats["dropped"] += dropped
+            failed = False
+            for (index_cls, using), (ops, pending) in batch.items():
+                if not self._process(index_cls, using, ops, pending):
+                    failed = True
                     break
-                last_index = index_cls
-                last_using = using
-                last_del = delete
-                last_ids = set(ids)
+                processed = True
+            if failed:
+                # leave remaining rows for the next replay
+                break
+        if processed:
+            self._schedule_invalidate()
+
+    def _schedule_invalidate(self):
+        """
+        Drop cached search responses once the posted updates are visible
+        """
+        delay = self._commit_within / 1000 if self._commit_within > 0 else 0
+        self._invalidations.append(time.time() + delay)
+
+    def _next_wait(self) -> float:
+        if self._invalidations:
+            return min(max(self._invalidations[0] - time.time(), 0), 5)
+        return 5
+
+    def _run_invalidations(self):
+        now = time.time()
+        due = False
+        while self._invalidations and self._invalidations[0] <= now:
+            self._invalidations.popleft()
+            due = True
+        if due:
+            self._invalidate()
+
+    def _invalidate(self):
+        try:
+            bump_generation()
+        except Exception:
+            LOGGER.exception("Error invalidating search cache")
+
+    def _chunks(self, ids) -> list:
+        ids = sorted(ids)
+        return [ids[pos:pos + self._chunk_size] for pos in range(0, len(ids), self._chunk_size)]
+
+    def _commit_args(self) -> dict:
+        if self._commit_within > 0:
+            return {"commit": False, "commitWithin": self._commit_within}
+        return {"commit": False, "softCommit": True}
+
+    def _render(self, index_cls, using, ids) -> list:
+        """
+        Prepare the Solr documents for a chunk of records
+        """
+        # search indexes keep per-document state, so use one per chunk
+        index = index_cls()
+        docs = []
+        try:
+            with timed("solr.render"):
+                for obj in index.index_queryset(using).filter(id__in=ids):
+                    try:
+                        docs.append(index.full_prepare(obj))
+                    except SkipDocument:
+                        LOGGER.debug("Indexing for object `%s` skipped", obj)
+        finally:
+            if self._pool and threading.current_thread() is not self._thread:
+                # release the database connection held by the pool thread
+                connections.close_all()
+        return docs
+
+    def _posted(self, count: int, delete: bool = False):
+        now = time.time()
+        with self._lock:
+            self._stats["removed" if delete else "indexed"] += count
+            self._stats["chunks"] += 1
+            self._rate.append((now, count))
+            while self._rate and self._rate[0][0] < now - self.RATE_WINDOW:
+                self._rate.popleft()
 
     def update(self, index_cls, using, ids):
         index = index_cls()
         backend = index.get_backend(using)
         if backend is not None:
             LOGGER.debug("Updating %d row(s) in solr queue: %s", len(ids), ids)
-            rows = index.index_queryset(using).filter(id__in=ids)
-            backend.update(index, rows)
+            chunks = self._chunks(ids)
+            boost = index.get_field_weights()
+            # render a limited number of chunks ahead of the one being posted
+            window = self._workers * 2
+            for pos in range(0, len(chunks), window):
+                batch = chunks[pos:pos + window]
+                if self._pool:
+                    rendered = self._pool.map(lambda chunk: self._render(index_cls, using, chunk), batch)
+                else:
+                    rendered = (self._render(index_cls, using, chunk) for chunk in batch)
+                for docs in rendered:
+                    if docs:
+                        with timed("solr.update"):
+                            backend.conn.add(docs, boost=boost, **self._commit_args())
+                    self._posted(len(docs))
 
     def remove(self, index_cls, using, ids):
         index = index_cls()
@@ -117,4 +420,24 @@ class SolrQueue:
         if backend is not None:
             LOGGER.debug("Removing %d row(s) in solr queue: %s", len(ids), ids)
             # backend.remove has no support for a list of IDs
-            backend.conn.delete(id=ids)
+            for chunk in self._chunks(ids):
+                with timed("solr.remove"):
+                    # deletes do not support commitWithin, use a soft commit
+                    backend.conn.delete(id=chunk, commit=False, softCommit=True)
+                self._posted(len(chunk), True)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._queue.mutex:
+            head = self._queue.queue[0][5] if self._queue.queue else None
+        with self._lock:
+            result = self._stats.copy()
+            while self._rate and self._rate[0][0] < now - self.RATE_WINDOW:
+                self._rate.popleft()
+            posted = sum(count for (_ts, count) in self._rate)
+            oldest = [ts for ts in (self._processing_since, self._deferred_since, head) if ts]
+        result["queued"] = self._queue.qsize()
+        result["durable"] = self._durable
+        result["oldest_pending_age"] = round(now - min(oldest), 3) if oldest else 0
+        result["docs_per_second"] = round(posted / self.RATE_WINDOW, 3)
+        return result
@@ -11,5 +11,6 @@ def get_routes():
         ("GET", "/health", views.combined_health, {}), # Replaces tob_api health endpoint
         #("GET", "/api/v2/indy/health", views.health, {}),
         ("GET", "/api/v2/indy/status", views.status, {}),
+        ("GET", "/api/v2/indy/metrics", views.metrics, {}),
         ("GET", "/api/v2/credential/{id}/verify", views.verify_credential, {}),
     )]
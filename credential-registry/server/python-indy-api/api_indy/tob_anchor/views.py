@@ -2,7 +2,6 @@ import asyncio
 import logging
 import math
 import os
-import time
 
 from aiohttp import web
 import django.db
@@ -37,15 +36,19 @@ from api_indy.indy.proof_request import ProofRequest
 from api_indy.indy.proof import ProofManager
 
 from api_v2.jsonschema.issuer import ISSUER_JSON_SCHEMA
+from api_v2.search import cache as search_cache
 
 from api_indy.tob_anchor.boot import (
-    indy_client, indy_holder_id, run_django
+    DB_CONNECTIONS, DJANGO_EXECUTOR, indy_client, indy_holder_id, run_django
+)
+from api_indy.tob_anchor.executor import ExecutorFull
+from api_indy.tob_anchor.instrument import (
+    INSTRUMENT, STATS, time_start as _time_start, time_end as _time_end, timed
 )
 
 LOGGER = logging.getLogger(__name__)
 
-INSTRUMENT = True
-STATS = {"min": {}, "max": {}, "total": {}, "count": {}}
+RETRY_AFTER = os.getenv("DJANGO_EXECUTOR_RETRY_AFTER", "5")
 
 INDY_KEYFINDER = None
 DJANGO_KEYFINDER = None
@@ -100,6 +103,18 @@ async def _check_signature(request, use_cache: bool = True):
     perf = _time_end(perf)
     return result
 
+def _busy_response(headers: dict = None):
+    """
+    Respond to a request rejected because the Django executor is saturated
+    """
+    headers = dict(headers or {})
+    headers["Retry-After"] = RETRY_AFTER
+    return web.json_response(
+        {"success": False, "result": "Service busy, please retry later"},
+        status=503,
+        headers=headers,
+    )
+
 def _validate_schema(data, schema):
     try:
         jsonschema.validate(data, schema)
@@ -107,19 +122,6 @@ def _validate_schema(data, schema):
         LOGGER.exception("Error validating schema:")
         raise IndyRequestError("Schema validation error: {}".format(e))
 
-def _time_start(*tasks):
-    return (tasks, time.perf_counter())
-
-def _time_end(timer):
-    (tasks, start) = timer
-    diff = time.perf_counter() - start
-    for task in tasks:
-        STATS["min"][task] = min(STATS["min"].get(task, diff), diff)
-        STATS["max"][task] = max(STATS["max"].get(task, 0), diff)
-        STATS["total"][task] = STATS["total"].get(task, 0) + diff
-        STATS["count"][task] = STATS["count"].get(task, 0) + 1
-    return diff
-
 
 async def generate_credential_request(request):
     """
@@ -153,6 +155,8 @@ async def generate_credential_request(request):
         response = await vonx_views.generate_credential_request(request, indy_holder_id())
     except IndyRequestError as e:
         response = e.response
+    except ExecutorFull:
+        response = _busy_response()
 
     LOGGER.warn("<<< Generate credential request: %s", _time_end(perf))
 
@@ -198,18 +202,27 @@ async def store_credential(request):
     LOGGER.warn(">>> Store credential")
     perf = _time_start("store_credential")
 
+    if DJANGO_EXECUTOR.full:
+        LOGGER.warn("<<< Store credential rejected: executor queue is full")
+        return _busy_response()
+
     try:
         await _check_signature(request)
         issuer_did = get_request_did(request)
         client = _indy_client()
         params = await get_request_json(request)
         processor = request.app["credqueue"] # CredentialProcessorQueue
-        stored, ret = await perform_store_credential(
-            client, indy_holder_id(), params, processor, issuer_did)
+        # vonx stores the credentials in the wallet and then waits on their
+        # processing, which is timed on its own as credential.process
+        with timed("store_credential.store_and_process"):
+            stored, ret = await perform_store_credential(
+                client, indy_holder_id(), params, processor, issuer_did)
         response = web.json_response(ret)
         response["stored"] = stored
     except IndyRequestError as e:
         response = e.response
+    except ExecutorFull:
+        response = _busy_response()
 
     LOGGER.warn("<<< Store credential: %s", _time_end(perf))
 
@@ -456,6 +469,8 @@ async def register_issuer(request):
         response = web.json_response(result)
     except IndyRequestError as e:
         response = e.response
+    except ExecutorFull:
+        response = _busy_response()
 
     LOGGER.warn("<<< Register issuer: %s", _time_end(perf))
 
@@ -483,6 +498,8 @@ async def construct_proof(request):
         response = await vonx_views.construct_proof(request, indy_holder_id())
     except IndyRequestError as e:
         response = e.response
+    except ExecutorFull:
+        response = _busy_response()
 
     LOGGER.warn("<<< Construct proof: %s", _time_end(perf))
 
@@ -526,7 +543,10 @@ async def verify_credential(request):
                 .get(id=credential_id)
         except CredentialModel.DoesNotExist:
             return None
-    credential = await run_django(fetch_cred, credential_id)
+    try:
+        credential = await run_django(fetch_cred, credential_id)
+    except ExecutorFull:
+        return _busy_response(headers)
     if not credential:
         LOGGER.warn("Credential not found: %s", credential_id)
         return web.json_response(
@@ -611,7 +631,7 @@ async def combined_health(request):
         except django.db.Error:
             LOGGER.exception("Error during DB health check")
             return False
-    ok = ok and await run_django(db_check)
+    ok = ok and await run_django(db_check, reject=False)
     return web.Response(
         text='ok' if ok else '',
         status=200 if ok else 451)
@@ -626,7 +646,29 @@ async def status(request):
     except IndyRequestError as e:
         return e.response
     if INSTRUMENT:
-        stats = STATS.copy()
-        stats["avg"] = {task: stats["total"][task] / stats["count"][task] for task in stats["count"]}
-        result["stats"] = stats
+        result["stats"] = STATS.stats()
+    result["executor"] = DJANGO_EXECUTOR.stats()
+    result["db_connections"] = DB_CONNECTIONS.stats()
+    solrqueue = request.app.get("solrqueue")
+    if solrqueue:
+        result["solrqueue"] = solrqueue.stats()
+    result["search_cache"] = search_cache.stats()
     return web.json_response(result)
+
+
+async def metrics(request):
+    """
+    Return request statistics in the Prometheus text format
+    """
+    gauges = {
+        "executor": DJANGO_EXECUTOR.stats(),
+        "db_connections": DB_CONNECTIONS.stats(),
+    }
+    solrqueue = request.app.get("solrqueue")
+    if solrqueue:
+        gauges["solrqueue"] = solrqueue.stats()
+    gauges["search_cache"] = search_cache.stats()
+    return web.Response(
+        text=STATS.prometheus(gauges=gauges),
+        headers={"Content-Type": "text/plain; version=0.0.4"},
+    )
@@ -9,23 +9,47 @@ LOGGER = logging.getLogger(__name__)
 ENV = config.load_settings()
 
 
+async def fetch_orgbook_json(http_client, url):
+    response = await http_client.get(url)
+    if response.status != 200:
+        raise RuntimeError(
+            'OrgBook API call failed: {}'.format(await response.text())
+        )
+    return await response.json()
+
 async def call_orgbook_api(uri):
     try:
         http_client = ClientSession()
 
         url = ENV.get('TOB_API_URL') + uri
-        response = await http_client.get(url)
-        if response.status != 200:
-            raise RuntimeError(
-                'OrgBook API call failed: {}'.format(await response.text())
-            )
-        result_json = await response.json()
+        result_json = await fetch_orgbook_json(http_client, url)
         return result_json
     except (Exception) as error:
         raise
     finally:
         await http_client.close()
 
+async def call_orgbook_api_list(uri):
+    """
+    Fetch every page of an OrgBook API listing
+    """
+    try:
+        http_client = ClientSession()
+
+        results = []
+        url = ENV.get('TOB_API_URL') + uri
+        while url:
+            page_json = await fetch_orgbook_json(http_client, url)
+            if isinstance(page_json, list):
+                # unpaginated listing
+                results.extend(page_json)
+                break
+            results.extend(page_json["results"])
+            url = page_json.get("next")
+        return results
+    finally:
+        await http_client.close()
+
 async def orgbook_creds_for_org(org_name):
     topic_uri = '/topic/ident/registration/' + org_name 
     topic_result_json = await call_orgbook_api(topic_uri)
@@ -37,7 +61,7 @@ async def orgbook_creds_for_org(org_name):
     topic_id = topic_result_json["id"]
 
     topic_search_uri = '/topic/' + str(topic_id) + '/credential/active'
-    result_json = await call_orgbook_api(topic_search_uri)
+    result_json = await call_orgbook_api_list(topic_search_uri)
 
     if 0 == len(result_json):
         raise RuntimeError(
@@ -14,7 +14,8 @@ from django.conf import settings
 
 engines = {
     'direct': 'haystack.backends.simple_backend.SimpleEngine',
-    'solr': 'haystack.backends.solr_backend.SolrEngine',
+    'solr': 'api_v2.search.backend.LoggedSolrEngine',
+    'solr_plain': 'haystack.backends.solr_backend.SolrEngine',
 }
 
 def getDefaultConfig():
@@ -2,8 +2,9 @@ from collections import OrderedDict
 import logging
 
 from django.core.paginator import Paginator
-from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +31,93 @@ class EnhancedPageNumberPagination(PageNumberPagination):
         )
 
 
+class SearchCursorPagination(EnhancedPageNumberPagination):
+    """
+    Used by search views. Switches from page numbers to Solr cursorMark
+    paging when a `cursor` parameter is provided (`cursor=*` for the first
+    page), so that deep pages cost the same as the first one and the
+    search result limit does not apply.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        if not self.cursor:
+            return super(SearchCursorPagination, self).paginate_queryset(
+                queryset, request, view)
+        self.request = request
+        self.cursor_page_size = self.get_page_size(request)
+
+        query = queryset.query
+        backend = query.backend
+        query_string = query.build_query()
+        params = query.build_params()
+        kwargs = backend.build_search_kwargs(query_string, **params)
+        kwargs.pop('start', None)
+        # cursors require a sort including the unique key
+        sort = kwargs.get('sort') or 'score desc'
+        kwargs['sort'] = '{}, id asc'.format(sort)
+        kwargs['rows'] = self.cursor_page_size
+        kwargs['cursorMark'] = self.cursor
+
+        raw_results = backend.conn.search(query_string, **kwargs)
+        results = backend._process_results(
+            raw_results, result_class=params.get('result_class'))
+        self.total = results['hits']
+        next_cursor = getattr(raw_results, 'nextCursorMark', None)
+        # Solr returns the same cursor once the results are exhausted
+        self.next_cursor = next_cursor if next_cursor != self.cursor else None
+        return list(queryset.post_process_results(results['results']))
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super(SearchCursorPagination, self).get_next_link()
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if self.cursor is None:
+            return super(SearchCursorPagination, self).get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("total", self.total),
+                    ("page_size", self.cursor_page_size),
+                    ("cursor", self.cursor),
+                    ("next_cursor", self.next_cursor),
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class ListCursorPagination(CursorPagination):
+    """
+    Cursor pagination for potentially large listings, returning `page_size`
+    results (100 by default) per page
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("page_size", self.page_size),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+
 class NullDjangoPaginator(Paginator):
     @property
     def count(self):
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/1.9/ref/settings/
 """
 
+import json
 import os
 import os.path
 
@@ -284,6 +285,61 @@ SEARCH_SKIP_WORDS = [
 # Return partial matches
 SEARCH_TERMS_EXCLUSIVE = False
 
+# Cache shared by all API processes, for example
+# SHARED_CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# with SHARED_CACHE_LOCATION=memcached:11211, or
+# django.core.cache.backends.db.DatabaseCache with a table created by
+# createcachetable. Caches needing invalidation across processes are
+# disabled when it is not configured
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+if os.getenv("SHARED_CACHE_BACKEND"):
+    CACHES["shared"] = {
+        "BACKEND": os.getenv("SHARED_CACHE_BACKEND"),
+        "LOCATION": os.getenv("SHARED_CACHE_LOCATION", ""),
+    }
+
+# Seconds before labels and flags cached in each process are reloaded, when
+# they have not been invalidated through the shared cache
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "300"))
+
+# Seconds to cache search, autocomplete and facet responses (0 to disable)
+# in the shared cache
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "30"))
+SEARCH_CACHE_ALIAS = "shared"
+
+# Store pre-serialized results in the search index and return them from search views
+SEARCH_STORED_DOCUMENTS = parse_bool(os.getenv("SEARCH_STORED_DOCUMENTS", "False"))
+
+# Read active topic names, addresses and attributes from the active_topic_fact
+# table. The table is only maintained while enabled, so populate it with the
+# refresh_topic_facts management command after enabling
+ACTIVE_TOPIC_FACTS = parse_bool(os.getenv("ACTIVE_TOPIC_FACTS", "False"))
+
+# Cache-Control headers for the registry API, keyed by "<resource>.<action>",
+# "<resource>" or "default", for example
+# {"default": "no-cache", "issuer": "public, max-age=300"}
+API_CACHE_CONTROL = json.loads(os.getenv("API_CACHE_CONTROL", '{"default": "no-cache"}'))
+
+# Number of decoded issuer and credential type logos kept in memory, and the
+# max-age sent with logo responses
+LOGO_CACHE_SIZE = int(os.getenv("LOGO_CACHE_SIZE", "500"))
+LOGO_MAX_AGE = int(os.getenv("LOGO_MAX_AGE", "86400"))
+
+# Seconds between refreshes of the cached home page statistics (0 to disable
+# the background refresher). Statistics older than twice the interval (or
+# 10 minutes when disabled) are recomputed by the next request
+QUICKLOAD_REFRESH_INTERVAL = int(os.getenv("QUICKLOAD_REFRESH_INTERVAL", "300"))
+
+# Fraction of search requests logged, and the duration above which search
+# requests are always logged
+SEARCH_LOG_SAMPLE_RATE = float(os.getenv("SEARCH_LOG_SAMPLE_RATE", "0.05"))
+SEARCH_LOG_SLOW_MS = int(os.getenv("SEARCH_LOG_SLOW_MS", "1000"))
+
+# Latency budget in milliseconds for name suggestions, passed to Solr as timeAllowed
+SEARCH_SUGGEST_BUDGET_MS = int(os.getenv("SEARCH_SUGGEST_BUDGET_MS", "200"))
+
 
 #
 # Read settings from a custom settings file